@@ -0,0 +1,77 @@
+import logging
+import logging.handlers
+import os
+import queue
+
+import orjson
+import structlog
+
+
+def _orjson_dumps(obj, **kwargs) -> str:
+    """Serialize a structlog event dict with orjson."""
+    return orjson.dumps(obj, default=kwargs.get("default")).decode()
+
+
+class _RecordQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that enqueues records as they are.
+
+    The stock handler formats each record on the calling thread and flattens
+    exc_info into the message, before ProcessorFormatter can render it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Leave formatting and exception rendering to the listener."""
+        return record
+
+
+def configure_logging() -> logging.handlers.QueueListener:
+    """
+    Configure application logging.
+
+    Log calls only enqueue the record; a QueueListener thread renders it as
+    JSON with structlog and writes it to stderr, keeping formatting and I/O
+    off the event loop.
+
+    Returns:
+        The QueueListener, which must be started and stopped by the caller
+    """
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+
+    shared_processors = [
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.add_logger_name,
+        structlog.processors.TimeStamper(fmt="iso"),
+    ]
+
+    formatter = structlog.stdlib.ProcessorFormatter(
+        foreign_pre_chain=shared_processors,
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(serializer=_orjson_dumps),
+        ],
+    )
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root_logger = logging.getLogger()
+    root_logger.handlers = [_RecordQueueHandler(log_queue)]
+    root_logger.setLevel(level)
+
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            *shared_processors,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+    return logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
@@ -1,25 +1,99 @@
 import logging
 import os
+import sys
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
+from fastapi.responses import ORJSONResponse
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
-from slowapi.util import get_remote_address
 
+from .logging_config import configure_logging
+from .middleware.rate_limit import RateLimitHeadersMiddleware, create_limiter
+from .middleware.response_cache import (
+    CACHE_POLICIES,
+    ResponseCacheMiddleware,
+)
+from .models import warm_up_models
+from .redis_client import close_redis, init_redis
 from .routes.chat import router as chat_router
+from .services.conversation_store import (
+    start_conversation_writer,
+    stop_conversation_writer,
+)
+from .services.http_client import close_http_client, get_http_client
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (records are written by a background listener thread)
+log_listener = configure_logging()
 logger = logging.getLogger(__name__)
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Initialize rate limiter (Redis-backed, falls back to in-memory)
+limiter = create_limiter()
+
+
+def check_unique_routes(app: FastAPI) -> None:
+    """
+    Ensure no path/method pair is registered twice.
+
+    Raises:
+        RuntimeError: If a route is registered more than once
+    """
+    seen = set()
+    for route in app.routes:
+        for method in getattr(route, "methods", None) or {None}:
+            key = (route.path, method)
+            if key in seen:
+                raise RuntimeError(
+                    f"Duplicate route registered: {method} {route.path}"
+                )
+            seen.add(key)
+
+
+def check_cached_routes(app: FastAPI) -> None:
+    """
+    Ensure no rate-limited route is served from the response cache.
+
+    Cached responses are returned before routing, so a cached route would
+    never have its rate limit checked.
+
+    Raises:
+        RuntimeError: If a rate-limited route has a cache policy
+    """
+    limited = (
+        limiter._route_limits.keys() | limiter._dynamic_route_limits.keys()
+    )
+    for route in app.routes:
+        endpoint = getattr(route, "endpoint", None)
+        if endpoint is None or route.path not in CACHE_POLICIES:
+            continue
+        if f"{endpoint.__module__}.{endpoint.__name__}" in limited:
+            raise RuntimeError(
+                f"Rate-limited route cannot be cached: {route.path}"
+            )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown hooks."""
+    log_listener.start()
+    check_unique_routes(app)
+    check_cached_routes(app)
+    warm_up_models()
+    await init_redis()
+    start_conversation_writer()
+    app.state.http = get_http_client()
+    yield
+    await close_http_client()
+    await stop_conversation_writer()
+    await close_redis()
+    log_listener.stop()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -28,11 +102,17 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add rate limiting
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_middleware(RateLimitHeadersMiddleware)
+
+# Cache idempotent GET responses in Redis
+app.add_middleware(ResponseCacheMiddleware)
 
 # Configure CORS
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
@@ -49,7 +129,7 @@ app.add_middleware(
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler for unhandled errors."""
     logger.error("Unhandled exception: %s", str(exc))
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
@@ -61,12 +141,28 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """HTTP exception handler for consistent error responses."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={"error": exc.detail, "detail": getattr(exc, "detail", None)},
     )
 
 
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(
+    request: Request, exc: RequestValidationError
+):
+    """Request validation handler for consistent error responses."""
+    detail = "; ".join(
+        "%s: %s"
+        % (".".join(str(loc) for loc in error["loc"][1:]), error["msg"])
+        for error in exc.errors()
+    )
+    return ORJSONResponse(
+        status_code=400,
+        content={"error": "Invalid request", "detail": detail},
+    )
+
+
 # Include routers
 app.include_router(chat_router)
 
@@ -96,6 +192,16 @@ if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     debug = os.getenv("DEBUG", "True").lower() == "true"
 
+    # Reload and multiple workers are mutually exclusive in uvicorn
+    workers = None if debug else int(os.getenv("WORKERS", 1))
+
     uvicorn.run(
-        "app.main:app", host=host, port=port, reload=debug, log_level="info"
+        "app.main:app",
+        host=host,
+        port=port,
+        reload=debug,
+        workers=workers,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        log_level="info",
     )
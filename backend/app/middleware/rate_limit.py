@@ -0,0 +1,74 @@
+import logging
+import os
+import time
+
+import redis
+from fastapi import Request
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from starlette.middleware.base import BaseHTTPMiddleware
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def create_limiter() -> Limiter:
+    """
+    Create the application rate limiter.
+
+    Limits are tracked in Redis with a moving-window strategy so counters are
+    shared across workers and survive restarts. If Redis cannot be reached the
+    limiter fails open to per-process in-memory storage.
+    """
+    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+    try:
+        client = redis.Redis.from_url(redis_url, socket_connect_timeout=1)
+        try:
+            client.ping()
+        finally:
+            client.close()
+
+        logger.info("Rate limiter using Redis storage at %s", redis_url)
+        return Limiter(
+            key_func=get_remote_address,
+            storage_uri=redis_url,
+            strategy="moving-window",
+            in_memory_fallback_enabled=True,
+        )
+    except Exception as e:
+        logger.warning(
+            "Redis unavailable for rate limiting, falling back to in-memory storage: %s",
+            e,
+        )
+        return Limiter(key_func=get_remote_address, strategy="moving-window")
+
+
+class RateLimitHeadersMiddleware(BaseHTTPMiddleware):
+    """
+    Middleware that exposes the current rate limit state as response headers.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+
+        current_limit = getattr(request.state, "view_rate_limit", None)
+        if current_limit is None:
+            return response
+
+        limit, args = current_limit
+        rate_limiter = request.app.state.limiter.limiter
+        try:
+            reset_time, remaining = rate_limiter.get_window_stats(limit, *args)
+        except Exception as e:
+            logger.warning("Failed to read rate limit window: %s", e)
+            return response
+
+        retry_after = max(0, int(reset_time - time.time()))
+        response.headers["X-RateLimit-Limit"] = str(limit.amount)
+        response.headers["X-RateLimit-Remaining"] = str(remaining)
+        response.headers["X-RateLimit-Reset"] = str(int(reset_time))
+        if response.status_code == 429 or remaining == 0:
+            response.headers["Retry-After"] = str(retry_after)
+
+        return response
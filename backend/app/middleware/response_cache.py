@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import math
+import os
+import time
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from ..redis_client import get_redis
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Per-path cache policies as (fresh_ttl, max_ttl) in seconds. Entries are
+# served directly while fresh and kept until max_ttl as a stale fallback.
+# Hits are answered before routing, so rate-limited paths must not be listed.
+CACHE_POLICIES: dict[str, tuple[int, int]] = {
+    "/": (30, 60),
+    "/chat/health": (1, 10),
+    "/chat/services": (30, 60),
+}
+
+# Extra seconds added to the Redis expiry on top of max_ttl
+CACHE_BUFFER_SECONDS = 2
+
+# Headers that describe the live request and must never be replayed
+UNCACHEABLE_HEADERS = {
+    "set-cookie",
+    "retry-after",
+    "x-ratelimit-limit",
+    "x-ratelimit-remaining",
+    "x-ratelimit-reset",
+}
+
+
+def _cache_key(request: Request) -> str:
+    """
+    Build the Redis key for a request from its method, path, query and auth.
+    """
+    path = request.url.path
+    raw = ":".join(
+        (
+            request.method,
+            path,
+            request.url.query,
+            request.headers.get("authorization", ""),
+        )
+    )
+    digest = hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+    return f"cache:{path}:{digest}"
+
+
+def _build_response(entry: dict, cache_status: str) -> Response:
+    """
+    Rebuild a response from a cached Redis hash.
+    """
+    headers = dict(orjson.loads(entry[b"headers"]))
+    headers["X-Cache"] = cache_status
+    return Response(
+        content=entry[b"body"],
+        status_code=int(entry[b"status"]),
+        headers=headers,
+    )
+
+
+async def invalidate_cache(*paths: str) -> None:
+    """
+    Drop all cached responses for the given paths.
+
+    Args:
+        paths: Request paths whose cached responses should be removed
+    """
+    client = get_redis()
+    if client is None:
+        return
+
+    try:
+        for path in paths:
+            keys = [key async for key in client.scan_iter(f"cache:{path}:*")]
+            if keys:
+                await client.delete(*keys)
+    except Exception as e:
+        logger.warning("Failed to invalidate response cache: %s", e)
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """
+    Redis-backed cache for idempotent GET endpoints.
+
+    Cached responses are returned before routing, so hits skip the handler
+    and JSON serialization entirely. Only paths listed in CACHE_POLICIES are
+    cached; since hits also skip rate limiting, rate-limited routes are never
+    listed there.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.serve_stale = (
+            os.getenv("CACHE_SERVE_STALE", "False").lower() == "true"
+        )
+
+    async def dispatch(self, request: Request, call_next):
+        policy = CACHE_POLICIES.get(request.url.path)
+        client = get_redis()
+        if request.method != "GET" or policy is None or client is None:
+            return await call_next(request)
+
+        fresh_ttl, max_ttl = policy
+        key = _cache_key(request)
+
+        try:
+            entry = await client.hgetall(key)
+        except Exception as e:
+            logger.warning("Response cache lookup failed: %s", e)
+            return await call_next(request)
+
+        if entry and time.time() < float(entry[b"stale_ts"]):
+            return _build_response(entry, "HIT")
+
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        except Exception:
+            if entry and self.serve_stale:
+                logger.warning("Serving stale cached response for %s", key)
+                return _build_response(entry, "STALE")
+            raise
+
+        if response.status_code != 200:
+            if entry and self.serve_stale and response.status_code >= 500:
+                return _build_response(entry, "STALE")
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = [
+            (name, value)
+            for name, value in response.headers.items()
+            if name.lower() not in UNCACHEABLE_HEADERS
+        ]
+
+        now = time.time()
+        generation_time = time.perf_counter() - started
+        expire = max_ttl + CACHE_BUFFER_SECONDS + math.ceil(generation_time)
+
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.hset(
+                    key,
+                    mapping={
+                        "ts": now,
+                        "stale_ts": now + fresh_ttl,
+                        "status": response.status_code,
+                        "headers": orjson.dumps(headers),
+                        "body": body,
+                    },
+                )
+                pipe.expire(key, expire)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("Failed to store cached response: %s", e)
+
+        cached_response = Response(
+            content=body,
+            status_code=response.status_code,
+            headers=response.headers,
+        )
+        cached_response.headers["X-Cache"] = "MISS"
+        return cached_response
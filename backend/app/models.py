@@ -1,12 +1,14 @@
 import uuid
-from typing import Optional
+from typing import Annotated, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
 
+    # Whitespace is stripped before the length check, so blank messages
+    # are rejected during validation
     message: str = Field(
         ..., min_length=1, max_length=5000, description="User message"
     )
@@ -14,13 +16,20 @@ class ChatRequest(BaseModel):
         None, description="Optional conversation ID"
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra="ignore",
+        defer_build=False,
+        frozen=True,
+        str_strip_whitespace=True,
+        validate_assignment=False,
+        arbitrary_types_allowed=False,
+        json_schema_extra={
             "example": {
                 "message": "Hello, how are you?",
-                "conversation_id": "550e8400-e29b-41d4-a716-446655440000",
+                "conversation_id": "550e8400e29b41d4a716446655440000",
             }
-        }
+        },
+    )
 
 
 class ChatResponse(BaseModel):
@@ -29,13 +38,75 @@ class ChatResponse(BaseModel):
     response: str = Field(..., description="AI agent response")
     conversation_id: str = Field(..., description="Conversation ID")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra="ignore",
+        defer_build=False,
+        frozen=True,
+        str_strip_whitespace=True,
+        json_schema_extra={
             "example": {
                 "response": "Hello! I'm doing well, thank you for asking.",
-                "conversation_id": "550e8400-e29b-41d4-a716-446655440000",
+                "conversation_id": "550e8400e29b41d4a716446655440000",
+            }
+        },
+    )
+
+
+class BatchRequest(BaseModel):
+    """Request model for batch endpoint."""
+
+    messages: List[Annotated[str, Field(min_length=1, max_length=5000)]] = (
+        Field(
+            ...,
+            min_length=1,
+            max_length=1000,
+            description="User messages, each answered without history",
+        )
+    )
+
+    model_config = ConfigDict(
+        extra="ignore",
+        defer_build=False,
+        frozen=True,
+        str_strip_whitespace=True,
+        json_schema_extra={
+            "example": {
+                "messages": [
+                    "Summarize the benefits of unit testing.",
+                    "Explain what a REST API is.",
+                ]
+            }
+        },
+    )
+
+
+class BatchResponse(BaseModel):
+    """Response model for batch endpoints."""
+
+    batch_id: str = Field(
+        ..., description="Batch ID, prefixed with the service that accepted it"
+    )
+    status: str = Field(..., description="Batch status (in_progress or ended)")
+    responses: Optional[List[Optional[str]]] = Field(
+        None,
+        description="Responses in submission order once the batch has ended (null for failed messages)",
+    )
+
+    model_config = ConfigDict(
+        extra="ignore",
+        defer_build=False,
+        frozen=True,
+        json_schema_extra={
+            "example": {
+                "batch_id": "anthropic:msgbatch_013Zva2CMHLNnXjNJJKqJ2EF",
+                "status": "ended",
+                "responses": [
+                    "Unit tests catch regressions early and document behavior.",
+                    "A REST API exposes resources over HTTP using standard methods.",
+                ],
             }
-        }
+        },
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -46,10 +117,44 @@ class ErrorResponse(BaseModel):
         None, description="Detailed error information"
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra="ignore",
+        defer_build=False,
+        frozen=True,
+        str_strip_whitespace=True,
+        json_schema_extra={
             "example": {
                 "error": "Invalid request",
                 "detail": "Message cannot be empty",
             }
-        }
+        },
+    )
+
+
+def warm_up_models() -> None:
+    """
+    Exercise each model's validator and serializer once so the first real
+    request does not pay for any lazy setup.
+    """
+    ChatRequest.model_validate({"message": "warmup"}).model_dump_json()
+    ChatResponse.model_validate(
+        {"response": "warmup", "conversation_id": "warmup"}
+    ).model_dump_json()
+    BatchRequest.model_validate({"messages": ["warmup"]}).model_dump_json()
+    BatchResponse.model_validate(
+        {"batch_id": "warmup", "status": "warmup", "responses": ["warmup"]}
+    ).model_dump_json()
+    ErrorResponse.model_validate(
+        {"error": "warmup", "detail": "warmup"}
+    ).model_dump_json()
+
+
+# Build every model's core schema now instead of on first use
+for model in (
+    ChatRequest,
+    ChatResponse,
+    BatchRequest,
+    BatchResponse,
+    ErrorResponse,
+):
+    model.model_rebuild(force=True)
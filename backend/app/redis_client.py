@@ -0,0 +1,57 @@
+import logging
+import os
+from typing import Optional
+
+import redis.asyncio as redis
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_client: Optional[redis.Redis] = None
+
+
+async def init_redis() -> Optional[redis.Redis]:
+    """
+    Connect the shared async Redis client.
+
+    Returns:
+        The connected client, or None if Redis is unreachable. Callers treat a
+        missing client as "feature disabled" rather than an error.
+    """
+    global _client
+
+    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    client = redis.Redis.from_url(
+        redis_url, socket_connect_timeout=1, socket_timeout=1
+    )
+
+    try:
+        await client.ping()
+    except Exception as e:
+        logger.warning(
+            "Redis unavailable at %s, continuing without it: %s", redis_url, e
+        )
+        await client.aclose()
+        return None
+
+    logger.info("Connected to Redis at %s", redis_url)
+    _client = client
+    return _client
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """
+    Get the shared async Redis client, or None if it is not connected.
+    """
+    return _client
+
+
+async def close_redis() -> None:
+    """
+    Close the shared async Redis client if it is connected.
+    """
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
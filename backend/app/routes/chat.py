@@ -1,8 +1,19 @@
 import logging
+import uuid
+from typing import AsyncIterator
 
+import orjson
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import Response, StreamingResponse
 
-from ..models import ChatRequest, ChatResponse, ErrorResponse
+from ..middleware.response_cache import invalidate_cache
+from ..models import (
+    BatchRequest,
+    BatchResponse,
+    ChatRequest,
+    ChatResponse,
+    ErrorResponse,
+)
 from ..services.ai_service_manager import ai_service_manager
 
 # Configure logging
@@ -14,15 +25,15 @@ router = APIRouter(prefix="/chat", tags=["chat"])
 
 @router.post(
     "",
-    response_model=ChatResponse,
     responses={
+        200: {"model": ChatResponse, "description": "Successful Response"},
         400: {"model": ErrorResponse, "description": "Bad Request"},
         500: {"model": ErrorResponse, "description": "Internal Server Error"},
     },
     summary="Send message to AI agent",
     description="Send a message to the AI agent and receive a response. Optionally include a conversation ID to maintain context.",
 )
-async def chat(request: ChatRequest) -> ChatResponse:
+async def chat(request: ChatRequest) -> Response:
     """
     Chat endpoint for AI agent interactions.
 
@@ -30,32 +41,25 @@ async def chat(request: ChatRequest) -> ChatResponse:
         request: ChatRequest containing message and optional conversation_id
 
     Returns:
-        ChatResponse with AI response and conversation_id
+        Response containing the JSON-serialized ChatResponse
 
     Raises:
         HTTPException: For various error conditions
     """
     try:
-        # Validate message content
-        if not request.message or request.message.strip() == "":
-            logger.warning("Empty message received")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Message cannot be empty",
-            )
-
         # Get the current AI service
         ai_service = ai_service_manager.get_service()
 
         # Process message through AI service
-        logger.info(
-            "Processing chat message for conversation: %s using %s service",
-            request.conversation_id,
-            ai_service_manager.get_service_name().upper(),
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Processing chat message for conversation: %s using %s service",
+                request.conversation_id,
+                ai_service_manager.get_service_name().upper(),
+            )
 
         ai_response, conversation_id = await ai_service.process_message(
-            message=request.message.strip(),
+            message=request.message,
             conversation_id=request.conversation_id,
         )
 
@@ -65,7 +69,9 @@ async def chat(request: ChatRequest) -> ChatResponse:
         )
 
         logger.info("Successfully processed chat request")
-        return response
+        return Response(
+            content=response.model_dump_json(), media_type="application/json"
+        )
 
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -80,6 +86,187 @@ async def chat(request: ChatRequest) -> ChatResponse:
         ) from e
 
 
+def _sse_event(data: dict, event: str = "message") -> str:
+    """Format a Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+@router.post(
+    "/stream",
+    responses={
+        200: {
+            "content": {"text/event-stream": {}},
+            "description": "Stream of Server-Sent Events",
+        },
+        400: {"model": ErrorResponse, "description": "Bad Request"},
+    },
+    summary="Stream message to AI agent",
+    description="Send a message to the AI agent and receive the response as Server-Sent Events. The first event carries the conversation ID, followed by message events with response chunks and a final done event.",
+)
+async def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """
+    Streaming chat endpoint for AI agent interactions.
+
+    Args:
+        request: ChatRequest containing message and optional conversation_id
+
+    Returns:
+        StreamingResponse emitting Server-Sent Events
+    """
+    ai_service = ai_service_manager.get_service()
+    conversation_id = request.conversation_id or uuid.uuid4().hex
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Streaming chat message for conversation: %s using %s service",
+            conversation_id,
+            ai_service_manager.get_service_name().upper(),
+        )
+
+    async def event_stream() -> AsyncIterator[str]:
+        yield _sse_event({"conversation_id": conversation_id}, "start")
+
+        try:
+            if hasattr(ai_service, "stream_message"):
+                async for chunk in ai_service.stream_message(
+                    message=request.message, conversation_id=conversation_id
+                ):
+                    yield _sse_event({"delta": chunk})
+            else:
+                # Services without streaming support send one chunk
+                ai_response, _ = await ai_service.process_message(
+                    message=request.message, conversation_id=conversation_id
+                )
+                yield _sse_event({"delta": ai_response})
+
+        except Exception as e:
+            logger.error("Unexpected error in chat stream: %s", str(e))
+            yield _sse_event(
+                {
+                    "error": "Internal server error occurred while processing your request"
+                },
+                "error",
+            )
+            return
+
+        yield _sse_event({"conversation_id": conversation_id}, "done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _get_batch_service(service_name: str):
+    """
+    Get an AI service by name, ensuring it supports batch processing.
+
+    Args:
+        service_name: Name of the service
+
+    Raises:
+        HTTPException: If the service is not configured or has no batch API
+    """
+    ai_service = ai_service_manager.get_service_by_name(service_name)
+    if ai_service is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"The {service_name} service is not configured",
+        )
+    if not hasattr(ai_service, "submit_batch"):
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Batch processing is not supported by the {service_name} service",
+        )
+    return ai_service
+
+
+@router.post(
+    "/batch",
+    response_model=BatchResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        400: {"model": ErrorResponse, "description": "Bad Request"},
+        501: {"model": ErrorResponse, "description": "Not Implemented"},
+    },
+    summary="Submit a batch of messages",
+    description="Submit independent messages to the current AI service's batch API for offline processing at reduced cost. Poll the returned batch ID for results; batches can take up to 24 hours. The batch ID is prefixed with the service name, so polls reach the same service even after switching.",
+)
+async def submit_batch(request: BatchRequest) -> BatchResponse:
+    """
+    Submit a batch of messages for asynchronous processing.
+
+    Args:
+        request: BatchRequest containing the messages
+
+    Returns:
+        BatchResponse with the batch ID
+    """
+    service_name = ai_service_manager.get_service_name()
+    ai_service = _get_batch_service(service_name)
+
+    try:
+        provider_batch_id = await ai_service.submit_batch(
+            list(request.messages)
+        )
+    except Exception as e:
+        logger.error("Failed to submit batch: %s", str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error occurred while submitting the batch",
+        ) from e
+
+    # Record the provider in the ID so polls are routed back to it
+    return BatchResponse(
+        batch_id=f"{service_name}:{provider_batch_id}", status="in_progress"
+    )
+
+
+@router.get(
+    "/batch/{batch_id}",
+    response_model=BatchResponse,
+    responses={
+        404: {"model": ErrorResponse, "description": "Not Found"},
+        501: {"model": ErrorResponse, "description": "Not Implemented"},
+    },
+    summary="Get batch results",
+    description="Get the status of a batch from the AI service that accepted it, with its responses once it has ended.",
+)
+async def get_batch(batch_id: str) -> BatchResponse:
+    """
+    Get the status and results of a submitted batch.
+
+    Args:
+        batch_id: The batch ID returned on submission
+
+    Returns:
+        BatchResponse with the responses once the batch has ended
+    """
+    service_name, _, provider_batch_id = batch_id.partition(":")
+    if not provider_batch_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown batch ID: {batch_id}",
+        )
+    ai_service = _get_batch_service(service_name)
+
+    try:
+        responses = await ai_service.get_batch_results(provider_batch_id)
+    except Exception as e:
+        logger.error("Failed to get batch %s: %s", batch_id, str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error occurred while fetching the batch",
+        ) from e
+
+    if responses is None:
+        return BatchResponse(batch_id=batch_id, status="in_progress")
+    return BatchResponse(
+        batch_id=batch_id, status="ended", responses=responses
+    )
+
+
 @router.get(
     "/health",
     summary="Health check for chat service",
@@ -120,9 +307,11 @@ async def switch_service(service_name: str):
     Args:
         service_name: Name of the service to switch to (openai, gemini, anthropic, dummy)
     """
-    success = ai_service_manager.switch_service(service_name)
+    success = await ai_service_manager.switch_service(service_name)
 
     if success:
+        # Service info endpoints are cached, so drop the stale entries
+        await invalidate_cache("/chat/services", "/chat/health")
         return {
             "success": True,
             "message": f"Successfully switched to {service_name.upper()} service",
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 from typing import Optional, Union
@@ -12,7 +13,6 @@ from .openai_ai_service import OpenAIAIService
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Type alias for AI services
@@ -20,65 +20,111 @@ AIServiceType = Union[
     OpenAIAIService, GeminiAIService, AnthropicAIService, DummyAIService
 ]
 
+# API key environment variable for each keyed service
+SERVICE_API_KEYS = (
+    ("openai", "OPENAI_API_KEY"),
+    ("gemini", "GEMINI_API_KEY"),
+    ("anthropic", "ANTHROPIC_API_KEY"),
+)
+
 
 class AIServiceManager:
     """
     Manager class for dynamically selecting and initializing AI services.
+
+    Every configured service is created up front, so switching services is
+    a reference swap and each client's connection pool is reused.
     """
 
     def __init__(self):
-        self._service: Optional[AIServiceType] = None
-        self._service_name: str = ""
+        self._lock = asyncio.Lock()
+
+        # API keys don't change at runtime, so resolve availability once
+        self._available_services: tuple[str, ...] = tuple(
+            service_name
+            for service_name, env_var in SERVICE_API_KEYS
+            if os.getenv(env_var)
+        ) + ("dummy",)
+
+        self._services: dict[str, AIServiceType] = self._create_services()
+        self._service_name: str = self._select_default_service()
+        self._service: AIServiceType = self._services[self._service_name]
 
     def get_service(self) -> AIServiceType:
         """
-        Get the currently active AI service, initializing if necessary.
+        Get the currently active AI service.
         """
-        if self._service is None:
-            self._service = self._initialize_service()
         return self._service
 
-    def _initialize_service(self) -> AIServiceType:
+    def get_service_by_name(
+        self, service_name: str
+    ) -> Optional[AIServiceType]:
         """
-        Initialize the appropriate AI service based on configuration and availability.
-        """
-        # Get preferred service from environment
-        preferred_service = os.getenv("AI_SERVICE", "openai").lower()
+        Get a configured AI service by name, whether or not it is active.
 
-        # Try to initialize services in order of preference
-        services_to_try = [preferred_service]
+        Args:
+            service_name: Name of the service
 
-        # Add fallback services if the preferred one fails
-        if preferred_service != "openai":
-            services_to_try.append("openai")
-        if preferred_service != "gemini":
-            services_to_try.append("gemini")
-        if preferred_service != "anthropic":
-            services_to_try.append("anthropic")
+        Returns:
+            The service, or None if it is not configured
+        """
+        return self._services.get(service_name.lower())
 
-        # Always add dummy as final fallback
-        services_to_try.append("dummy")
+    def _create_services(self) -> dict[str, AIServiceType]:
+        """
+        Create an instance of every service that has an API key configured.
+        """
+        services: dict[str, AIServiceType] = {}
 
-        for service_name in services_to_try:
+        for service_name in self._available_services:
             try:
                 service = self._create_service(service_name)
                 if service:
-                    self._service_name = service_name
+                    services[service_name] = service
                     logger.info(
                         "Successfully initialized %s AI service",
                         service_name.upper(),
                     )
-                    return service
             except Exception as e:
                 logger.warning(
                     "Failed to initialize %s service: %s",
                     service_name.upper(),
                     e,
                 )
-                continue
 
-        # This should never happen since dummy service should always work
-        raise RuntimeError("Failed to initialize any AI service")
+        if not services:
+            # This should never happen since dummy service should always work
+            raise RuntimeError("Failed to initialize any AI service")
+
+        return services
+
+    def _select_default_service(self) -> str:
+        """
+        Pick the active service based on configuration and availability.
+        """
+        # Get preferred service from environment
+        preferred_service = os.getenv("AI_SERVICE", "openai").lower()
+
+        # Fall back to the other services, with dummy as the final fallback
+        services_to_try = [
+            preferred_service,
+            "openai",
+            "gemini",
+            "anthropic",
+            "dummy",
+        ]
+
+        for service_name in services_to_try:
+            if service_name in self._services:
+                if service_name != preferred_service:
+                    logger.warning(
+                        "%s service unavailable, falling back to %s",
+                        preferred_service.upper(),
+                        service_name.upper(),
+                    )
+                return service_name
+
+        return next(iter(self._services))
 
     def _create_service(self, service_name: str) -> Optional[AIServiceType]:
         """
@@ -100,11 +146,9 @@ class AIServiceManager:
         """
         Get the name of the currently active service.
         """
-        if self._service is None:
-            self.get_service()  # Initialize if needed
         return self._service_name
 
-    def switch_service(self, service_name: str) -> bool:
+    async def switch_service(self, service_name: str) -> bool:
         """
         Switch to a different AI service.
 
@@ -114,38 +158,27 @@ class AIServiceManager:
         Returns:
             True if switch was successful, False otherwise
         """
-        try:
-            new_service = self._create_service(service_name.lower())
-            if new_service:
-                self._service = new_service
-                self._service_name = service_name.lower()
-                logger.info("Switched to %s AI service", service_name.upper())
-                return True
-        except Exception as e:
+        service_name = service_name.lower()
+        service = self._services.get(service_name)
+        if service is None:
             logger.error(
-                "Failed to switch to %s service: %s", service_name.upper(), e
+                "Failed to switch to %s service: service is not configured",
+                service_name.upper(),
             )
+            return False
+
+        async with self._lock:
+            self._service = service
+            self._service_name = service_name
 
-        return False
+        logger.info("Switched to %s AI service", service_name.upper())
+        return True
 
-    def get_available_services(self) -> list[str]:
+    def get_available_services(self) -> tuple[str, ...]:
         """
-        Get list of available AI services based on API key configuration.
+        Get the AI services available based on API key configuration.
         """
-        available = []
-
-        # Check which API keys are configured
-        if os.getenv("OPENAI_API_KEY"):
-            available.append("openai")
-        if os.getenv("GEMINI_API_KEY"):
-            available.append("gemini")
-        if os.getenv("ANTHROPIC_API_KEY"):
-            available.append("anthropic")
-
-        # Dummy is always available
-        available.append("dummy")
-
-        return available
+        return self._available_services
 
 
 # Global AI service manager instance
@@ -1,14 +1,42 @@
+import asyncio
 import logging
 import os
 import uuid
-from typing import Dict, List, Optional
-
-from anthropic import AsyncAnthropic
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+import httpx
+from anthropic import APIConnectionError, AsyncAnthropic
+
+from .conversation_store import ConversationStore
+from .history_summary import (
+    SUMMARY_INSTRUCTION,
+    SUMMARY_MAX_TOKENS,
+    HistorySummarizer,
+)
+from .http_client import get_http_client
+from .prompt_cache import PromptCache
+from .request_coalescer import RequestCoalescer
+from .retry import is_retryable_status, provider_retry
+from .token_bucket import TokenBucket, estimate_tokens
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = "You are a helpful AI assistant. Be concise, friendly, and helpful in your responses."
+
+# System prompt block marked for prompt caching. It always comes first and
+# never changes, so repeated calls hit Anthropic's prompt cache.
+SYSTEM_BLOCK = {
+    "type": "text",
+    "text": SYSTEM_PROMPT,
+    "cache_control": {"type": "ephemeral"},
+}
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Retry connection errors, rate limits and server errors."""
+    return isinstance(exc, APIConnectionError) or is_retryable_status(exc)
+
 
 class AnthropicAIService:
     """
@@ -16,7 +44,8 @@ class AnthropicAIService:
     """
 
     def __init__(self):
-        self.conversations: Dict[str, List[Dict[str, str]]] = {}
+        self.conversations = ConversationStore("anthropic")
+        self._inflight = RequestCoalescer()
 
         # Initialize Anthropic client
         api_key = os.getenv("ANTHROPIC_API_KEY")
@@ -25,17 +54,70 @@ class AnthropicAIService:
                 "ANTHROPIC_API_KEY environment variable is required"
             )
 
-        self.client = AsyncAnthropic(api_key=api_key)
+        # The SDK client is created on first use; see the client property
+        self._api_key = api_key
+        self._client: Optional[AsyncAnthropic] = None
+        self._client_http: Optional[httpx.AsyncClient] = None
 
         # Configuration from environment
         self.model = os.getenv("ANTHROPIC_MODEL", "claude-3-sonnet-20240229")
         self.temperature = float(os.getenv("ANTHROPIC_TEMPERATURE", "0.7"))
         self.max_tokens = int(os.getenv("ANTHROPIC_MAX_TOKENS", "150"))
+        self.max_history_messages = int(
+            os.getenv("ANTHROPIC_MAX_HISTORY_MESSAGES", "20")
+        )
+
+        # Responses to identical recent prompts are reused
+        self._prompt_cache = PromptCache()
+
+        # Older messages beyond the window are replaced by a rolling summary
+        self.summarizer = HistorySummarizer(
+            self._summarize,
+            window=self.max_history_messages,
+            enabled=os.getenv("ANTHROPIC_SUMMARIZE_HISTORY", "True").lower()
+            == "true",
+        )
+
+        # Cap concurrent API calls so bursts queue locally instead of
+        # triggering provider rate limits. Anthropic allows few concurrent
+        # connections per key, so the default is low.
+        self._semaphore = asyncio.Semaphore(
+            int(os.getenv("ANTHROPIC_MAX_INFLIGHT", "5"))
+        )
+        self._rate_limit = TokenBucket(
+            rpm=int(os.getenv("ANTHROPIC_RPM", "50")),
+            tpm=int(os.getenv("ANTHROPIC_TPM", "40000")),
+        )
 
         logger.info(
             "AIService initialized with Anthropic model: %s", self.model
         )
 
+    @property
+    def client(self) -> AsyncAnthropic:
+        """
+        The Anthropic client, bound to the current shared HTTP client.
+
+        It is created on first use rather than when the service is, and
+        rebuilt once the shared HTTP client has been closed and replaced
+        (e.g. when the app is restarted within the same process).
+        """
+        http_client = get_http_client()
+        if self._client is not None and self._client_http is http_client:
+            return self._client
+
+        try:
+            self._client = AsyncAnthropic(
+                api_key=self._api_key, http_client=http_client, max_retries=0
+            )
+        except TypeError:
+            # Newer SDK releases ship their own HTTP stack and reject httpx
+            # clients; their default pool is already sized for concurrency
+            logger.info("Anthropic SDK rejected shared HTTP client")
+            self._client = AsyncAnthropic(api_key=self._api_key, max_retries=0)
+        self._client_http = http_client
+        return self._client
+
     async def process_message(
         self, message: str, conversation_id: Optional[str] = None
     ) -> tuple[str, str]:
@@ -51,39 +133,139 @@ class AnthropicAIService:
         """
         try:
             # Generate conversation ID if not provided
-            if not conversation_id:
-                conversation_id = str(uuid.uuid4())
+            is_new_conversation = not conversation_id
+            if is_new_conversation:
+                conversation_id = uuid.uuid4().hex
+
+            # Serialize turns within a conversation so history stays ordered
+            async with self.conversations.lock(conversation_id):
+                # Add user message to conversation history
+                await self.conversations.append(
+                    conversation_id, "user", message
+                )
+
+                # Generate AI response using Anthropic. Identical first
+                # messages arriving concurrently share a single API call.
+                if is_new_conversation:
+                    ai_response = await self._inflight.run(
+                        RequestCoalescer.key(message),
+                        lambda: self._generate_anthropic_response(
+                            conversation_id
+                        ),
+                    )
+                else:
+                    ai_response = await self._generate_anthropic_response(
+                        conversation_id
+                    )
+
+                # Add AI response to conversation history. Empty replies are
+                # not stored, since providers reject empty assistant turns.
+                if ai_response:
+                    await self.conversations.append(
+                        conversation_id, "assistant", ai_response
+                    )
+
+                logger.info(
+                    "Successfully processed message for conversation %s",
+                    conversation_id,
+                )
+                return ai_response, conversation_id
+
+        except Exception as e:
+            logger.error("Error processing message: %s", str(e))
+            # Return a fallback message instead of raising an exception
+            fallback_response = "I apologize, but I'm experiencing some technical difficulties right now. Please try again in a moment."
+            return fallback_response, conversation_id or uuid.uuid4().hex
+
+    async def stream_message(
+        self, message: str, conversation_id: str
+    ) -> AsyncIterator[str]:
+        """
+        Process a user message and stream the AI response as it is generated.
+
+        The complete response is added to the conversation history once the
+        stream ends, so history is written once per turn rather than per token.
 
-            # Initialize conversation history if new
-            if conversation_id not in self.conversations:
-                self.conversations[conversation_id] = []
+        Args:
+            message: User message to process
+            conversation_id: Conversation ID
 
+        Yields:
+            Chunks of the AI response text
+        """
+        # Serialize turns within a conversation so history stays ordered
+        async with self.conversations.lock(conversation_id):
             # Add user message to conversation history
-            self.conversations[conversation_id].append(
-                {"role": "user", "content": message}
-            )
+            await self.conversations.append(conversation_id, "user", message)
 
-            # Generate AI response using Anthropic
-            ai_response = await self._generate_anthropic_response(
-                conversation_id
-            )
+            system, messages = await self._build_request(conversation_id)
 
-            # Add AI response to conversation history
-            self.conversations[conversation_id].append(
-                {"role": "assistant", "content": ai_response}
+            logger.info(
+                "Streaming from Anthropic API with %d messages", len(messages)
             )
 
+            chunks: List[str] = []
+            stream = await self._create_message(messages, system, stream=True)
+            try:
+                # Closing the stream early (e.g. on client disconnect) stops
+                # generation on the provider side
+                async with stream:
+                    async for event in stream:
+                        if (
+                            event.type == "content_block_delta"
+                            and event.delta.type == "text_delta"
+                        ):
+                            chunks.append(event.delta.text)
+                            yield event.delta.text
+            finally:
+                self._semaphore.release()
+
+            # Add AI response to conversation history. Empty replies are not
+            # stored, since providers reject empty assistant turns.
+            ai_response = "".join(chunks).strip()
+            if ai_response:
+                await self.conversations.append(
+                    conversation_id, "assistant", ai_response
+                )
+
             logger.info(
-                "Successfully processed message for conversation %s",
+                "Successfully streamed message for conversation %s",
                 conversation_id,
             )
-            return ai_response, conversation_id
 
-        except Exception as e:
-            logger.error("Error processing message: %s", str(e))
-            # Return a fallback message instead of raising an exception
-            fallback_response = "I apologize, but I'm experiencing some technical difficulties right now. Please try again in a moment."
-            return fallback_response, conversation_id or str(uuid.uuid4())
+    async def _build_request(
+        self, conversation_id: str
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+        """
+        Build the system blocks and messages sent to Anthropic.
+
+        Args:
+            conversation_id: The conversation ID to get history for
+
+        Returns:
+            Tuple of (system blocks, messages)
+        """
+        # Get the most recent conversation history and any summary of the
+        # messages before it
+        history = await self.conversations.get(conversation_id)
+        summary, messages = self.summarizer.apply(conversation_id, history)
+
+        # Anthropic requires the messages to start with a user turn
+        start = 0
+        while start < len(messages) - 1 and messages[start]["role"] != "user":
+            start += 1
+
+        # The summary goes after the cached block so it never invalidates it
+        system = [SYSTEM_BLOCK]
+        if summary:
+            system.append(
+                {
+                    "type": "text",
+                    "text": f"Summary of the earlier conversation: {summary}",
+                }
+            )
+
+        return system, messages[start:]
 
     async def _generate_anthropic_response(self, conversation_id: str) -> str:
         """
@@ -96,27 +278,30 @@ class AnthropicAIService:
             AI response string
         """
         try:
-            # Get conversation history
-            messages = self.conversations.get(conversation_id, [])
-
-            # Anthropic uses system parameter separately from messages
-            system_message = "You are a helpful AI assistant. Be concise, friendly, and helpful in your responses."
+            system, messages = await self._build_request(conversation_id)
+
+            cache_key = PromptCache.key(
+                self.model,
+                self.temperature,
+                self.max_tokens,
+                system,
+                messages,
+            )
+            cached_response = self._prompt_cache.get(cache_key)
+            if cached_response is not None:
+                logger.info("Using cached Anthropic response")
+                return cached_response
 
             # Call Anthropic API
             logger.info(
                 "Calling Anthropic API with %d messages", len(messages)
             )
 
-            response = await self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                system=system_message,
-                messages=messages,
-            )
+            response = await self._create_message(messages, system)
 
             # Extract response content
             ai_response = response.content[0].text.strip()
+            self._prompt_cache.set(cache_key, ai_response)
 
             logger.info("Anthropic API response received successfully")
             return ai_response
@@ -125,7 +310,149 @@ class AnthropicAIService:
             logger.error("Error calling Anthropic API: %s", str(e))
             raise Exception("Failed to generate AI response") from e
 
-    def get_conversation_history(
+    async def _summarize(self, transcript: str) -> str:
+        """
+        Summarize part of a conversation for the history summarizer.
+
+        Args:
+            transcript: The conversation text to summarize
+
+        Returns:
+            Summary text
+        """
+        messages = [{"role": "user", "content": transcript}]
+
+        response = await self._create_message(
+            messages, SUMMARY_INSTRUCTION, max_tokens=SUMMARY_MAX_TOKENS
+        )
+        return response.content[0].text.strip()
+
+    @provider_retry(_is_retryable)
+    async def _create_message(
+        self,
+        messages: List[Dict[str, str]],
+        system: Union[str, List[Dict[str, Any]]],
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ):
+        """
+        Call the Anthropic Messages API, retrying transient errors.
+
+        Each attempt waits for its own share of the rate budget and an
+        in-flight slot, and a failed attempt gives the slot back before
+        backing off. A stream is only retried while it is being opened, and
+        its slot stays held until the caller releases the semaphore.
+
+        Extra keyword arguments are passed through to the API.
+        """
+        max_tokens = max_tokens or self.max_tokens
+        await self._rate_limit.acquire(estimate_tokens(messages, max_tokens))
+        await self._semaphore.acquire()
+        try:
+            response = await self.client.messages.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                temperature=self.temperature,
+                # Anthropic uses system parameter separately from messages
+                system=system,
+                messages=messages,
+                **kwargs,
+            )
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        if not kwargs.get("stream"):
+            self._semaphore.release()
+        return response
+
+    async def submit_batch(self, messages: List[str]) -> str:
+        """
+        Submit independent single-turn messages to the Message Batches API.
+
+        Batches are processed asynchronously at a lower cost than
+        interactive calls, and take up to 24 hours to complete.
+
+        Args:
+            messages: User messages, each answered without history
+
+        Returns:
+            The batch ID
+        """
+        batch = await self.client.messages.batches.create(
+            requests=[
+                {
+                    "custom_id": str(index),
+                    "params": {
+                        "model": self.model,
+                        "max_tokens": self.max_tokens,
+                        "temperature": self.temperature,
+                        "system": [SYSTEM_BLOCK],
+                        "messages": [{"role": "user", "content": message}],
+                    },
+                }
+                for index, message in enumerate(messages)
+            ]
+        )
+        logger.info(
+            "Submitted Anthropic batch %s with %d messages",
+            batch.id,
+            len(messages),
+        )
+        return batch.id
+
+    async def get_batch_results(
+        self, batch_id: str
+    ) -> Optional[List[Optional[str]]]:
+        """
+        Get the results of a submitted batch.
+
+        Args:
+            batch_id: The batch ID
+
+        Returns:
+            Responses in submission order (None for failed messages), or
+            None while the batch is still processing
+        """
+        batch = await self.client.messages.batches.retrieve(batch_id)
+        if batch.processing_status != "ended":
+            return None
+
+        counts = batch.request_counts
+        total = (
+            counts.succeeded
+            + counts.errored
+            + counts.canceled
+            + counts.expired
+            + counts.processing
+        )
+        responses: List[Optional[str]] = [None] * total
+        results = await self.client.messages.batches.results(batch_id)
+        async for entry in results:
+            if entry.result.type == "succeeded":
+                content = entry.result.message.content[0].text
+                responses[int(entry.custom_id)] = content.strip()
+        return responses
+
+    async def batch_process(
+        self, messages: List[str], poll_interval: float = 30.0
+    ) -> List[Optional[str]]:
+        """
+        Process messages through the Message Batches API and wait for them.
+
+        Args:
+            messages: User messages, each answered without history
+            poll_interval: Seconds between batch status checks
+
+        Returns:
+            Responses in submission order (None for failed messages)
+        """
+        batch_id = await self.submit_batch(messages)
+        while (responses := await self.get_batch_results(batch_id)) is None:
+            await asyncio.sleep(poll_interval)
+        return responses
+
+    async def get_conversation_history(
         self, conversation_id: str
     ) -> List[Dict[str, str]]:
         """
@@ -137,9 +464,9 @@ class AnthropicAIService:
         Returns:
             List of conversation messages
         """
-        return self.conversations.get(conversation_id, [])
+        return await self.conversations.get(conversation_id)
 
-    def clear_conversation(self, conversation_id: str) -> bool:
+    async def clear_conversation(self, conversation_id: str) -> bool:
         """
         Clear conversation history for a given conversation ID.
 
@@ -149,8 +476,8 @@ class AnthropicAIService:
         Returns:
             True if conversation was cleared, False if it didn't exist
         """
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        self.summarizer.forget(conversation_id)
+        cleared = await self.conversations.clear(conversation_id)
+        if cleared:
             logger.info("Cleared conversation %s", conversation_id)
-            return True
-        return False
+        return cleared
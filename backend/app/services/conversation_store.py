@@ -0,0 +1,378 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional
+from weakref import WeakValueDictionary
+
+import orjson
+
+from ..redis_client import get_redis
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class _Write(NamedTuple):
+    """A pending Redis write; a message of None deletes the conversation."""
+
+    key: str
+    message: Optional[bytes]
+    max_messages: int
+    ttl: int
+
+
+class _Cached(NamedTuple):
+    """A local copy of a conversation and the Redis version it matches."""
+
+    history: List[Dict[str, str]]
+    version: int
+
+
+# Pending Redis writes shared by all stores, flushed by a background task
+_write_queue: Optional[asyncio.Queue] = None
+_writer_task: Optional[asyncio.Task] = None
+
+# Number of queued or in-flight writes per conversation key
+_pending_writes: Dict[str, int] = {}
+
+
+def _version_key(key: str) -> str:
+    """
+    Key of the counter bumped by every append to a conversation list.
+    """
+    return f"ver:{key}"
+
+
+async def _flush(writes: List[_Write]) -> None:
+    """
+    Apply pending writes to Redis in order, in a single round trip.
+    """
+    client = get_redis()
+    if client is None:
+        return
+
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            for write in writes:
+                version_key = _version_key(write.key)
+                if write.message is None:
+                    pipe.delete(write.key, version_key)
+                    continue
+                pipe.rpush(write.key, write.message)
+                pipe.ltrim(write.key, -write.max_messages, -1)
+                pipe.expire(write.key, write.ttl)
+                pipe.incr(version_key)
+                pipe.expire(version_key, write.ttl)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(
+            "Failed to persist %d conversation writes to Redis: %s",
+            len(writes),
+            e,
+        )
+    finally:
+        for write in writes:
+            remaining = _pending_writes.get(write.key, 1) - 1
+            if remaining > 0:
+                _pending_writes[write.key] = remaining
+            else:
+                _pending_writes.pop(write.key, None)
+
+
+async def _writer_loop(
+    queue: asyncio.Queue, batch_size: int, flush_interval: float
+) -> None:
+    """
+    Flush queued writes in batches of up to batch_size, waiting up to
+    flush_interval seconds for a batch to fill.
+    """
+    while True:
+        writes = [await queue.get()]
+        try:
+            if flush_interval and queue.qsize() < batch_size - 1:
+                await asyncio.sleep(flush_interval)
+        finally:
+            while len(writes) < batch_size and not queue.empty():
+                writes.append(queue.get_nowait())
+            await _flush(writes)
+
+
+def start_conversation_writer() -> None:
+    """
+    Start the background task that persists conversation history to Redis.
+
+    Until it is started, writes go to Redis directly.
+    """
+    global _write_queue, _writer_task
+
+    _write_queue = asyncio.Queue(
+        maxsize=int(os.getenv("CONVERSATION_WRITE_QUEUE_SIZE", "10000"))
+    )
+    _writer_task = asyncio.create_task(
+        _writer_loop(
+            _write_queue,
+            int(os.getenv("CONVERSATION_WRITE_BATCH_SIZE", "100")),
+            int(os.getenv("CONVERSATION_WRITE_INTERVAL_MS", "10")) / 1000,
+        )
+    )
+
+
+async def stop_conversation_writer() -> None:
+    """
+    Stop the background writer and flush any writes still queued.
+    """
+    global _write_queue, _writer_task
+
+    if _writer_task is None:
+        return
+
+    _writer_task.cancel()
+    try:
+        await _writer_task
+    except asyncio.CancelledError:
+        pass
+
+    remaining = []
+    while not _write_queue.empty():
+        remaining.append(_write_queue.get_nowait())
+    if remaining:
+        await _flush(remaining)
+
+    _write_queue = None
+    _writer_task = None
+
+
+async def _persist(write: _Write) -> None:
+    """
+    Queue a write for the background writer, or apply it directly when the
+    writer is not running or its queue is full.
+    """
+    _pending_writes[write.key] = _pending_writes.get(write.key, 0) + 1
+    if _write_queue is not None:
+        try:
+            _write_queue.put_nowait(write)
+            return
+        except asyncio.QueueFull:
+            logger.warning("Conversation write queue full, writing directly")
+    await _flush([write])
+
+
+class LRUMapping(OrderedDict):
+    """
+    OrderedDict keyed by conversation ID with least-recently-used eviction at
+    a fixed capacity and an optional time-to-live.
+
+    Reads and writes move the entry to the most-recent end; inserting into a
+    full mapping drops the oldest entry. With a ttl, an entry not written for
+    ttl seconds is treated as missing, matching the expiry Redis applies to
+    persisted conversations. Eviction is purely in-memory and never touches
+    Redis.
+    """
+
+    def __init__(self, cap: int, ttl: Optional[float] = None):
+        super().__init__()
+        self.cap = cap
+        self.ttl = ttl
+
+    def _expired(self, written: float) -> bool:
+        return bool(self.ttl) and written + self.ttl <= time.monotonic()
+
+    def __getitem__(self, conversation_id: str) -> Any:
+        written, value = super().__getitem__(conversation_id)
+        if self._expired(written):
+            super().__delitem__(conversation_id)
+            raise KeyError(conversation_id)
+        self.move_to_end(conversation_id)
+        return value
+
+    def __setitem__(self, conversation_id: str, value: Any) -> None:
+        if conversation_id in self:
+            self.move_to_end(conversation_id)
+        elif len(self) >= self.cap:
+            self.popitem(last=False)
+        super().__setitem__(conversation_id, (time.monotonic(), value))
+
+    def get(self, conversation_id: str, default=None):
+        try:
+            return self[conversation_id]
+        except KeyError:
+            return default
+
+    def pop(self, conversation_id: str, *default):
+        if conversation_id in self:
+            written, value = super().pop(conversation_id)
+            if not self._expired(written):
+                return value
+        if default:
+            return default[0]
+        raise KeyError(conversation_id)
+
+
+class ConversationStore:
+    """
+    Bounded store for conversation history.
+
+    Recent conversations live in an in-process LRU mapping. When
+    Redis is connected, each conversation is also persisted as a capped list
+    under ``conv:{namespace}:{conversation_id}`` so history is shared across
+    workers and survives restarts. Redis writes are queued and flushed in
+    batches by a background task, keeping them off the request path.
+
+    With Redis, the persisted list is the source of truth. Every append
+    bumps a version counter next to it, and the local copy is only used
+    while its version matches (or this worker still has writes for it
+    queued); otherwise the conversation is reloaded, picking up turns
+    served by other workers.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.ttl = int(os.getenv("CONVERSATION_TTL_SECONDS", "3600"))
+        self.max_messages = int(os.getenv("CONVERSATION_MAX_MESSAGES", "40"))
+        self._local = LRUMapping(
+            int(os.getenv("CONVERSATIONS_LRU_CAP", "10000")), self.ttl
+        )
+        self._locks: "WeakValueDictionary[str, asyncio.Lock]" = (
+            WeakValueDictionary()
+        )
+
+    def lock(self, conversation_id: str) -> asyncio.Lock:
+        """
+        Get the lock serializing turns within a conversation.
+
+        Locks are only weakly referenced, so each one disappears as soon as
+        no turn holds or awaits it.
+
+        Args:
+            conversation_id: The conversation ID
+
+        Returns:
+            The conversation's lock
+        """
+        lock = self._locks.get(conversation_id)
+        if lock is None:
+            lock = self._locks[conversation_id] = asyncio.Lock()
+        return lock
+
+    def _key(self, conversation_id: str) -> str:
+        return f"conv:{self.namespace}:{conversation_id}"
+
+    async def get(self, conversation_id: str) -> List[Dict[str, str]]:
+        """
+        Get the history for a conversation, loading it from Redis on a miss.
+
+        Args:
+            conversation_id: The conversation ID
+
+        Returns:
+            List of conversation messages (empty for a new conversation)
+        """
+        return (await self._load(conversation_id)).history
+
+    async def _load(self, conversation_id: str) -> _Cached:
+        """
+        Get the local copy of a conversation, refreshing it from Redis if
+        another worker has changed it since.
+        """
+        cached = self._local.get(conversation_id)
+        client = get_redis()
+        key = self._key(conversation_id)
+        if cached is not None:
+            # This worker's own queued writes are newer than Redis
+            if client is None or key in _pending_writes:
+                return cached
+            try:
+                version = int(await client.get(_version_key(key)) or 0)
+            except Exception as e:
+                logger.warning(
+                    "Failed to check conversation %s in Redis: %s",
+                    conversation_id,
+                    e,
+                )
+                return cached
+            if version == cached.version:
+                return cached
+
+        history, version = [], 0
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=True) as pipe:
+                    pipe.lrange(key, 0, -1)
+                    pipe.get(_version_key(key))
+                    raw, raw_version = await pipe.execute()
+                history = [orjson.loads(item) for item in raw]
+                version = int(raw_version or 0)
+            except Exception as e:
+                logger.warning(
+                    "Failed to load conversation %s from Redis: %s",
+                    conversation_id,
+                    e,
+                )
+
+        cached = _Cached(history, version)
+        self._local[conversation_id] = cached
+        return cached
+
+    async def append(
+        self, conversation_id: str, role: str, content: str
+    ) -> None:
+        """
+        Append a message to a conversation, keeping only the latest messages.
+
+        Args:
+            conversation_id: The conversation ID
+            role: Role of the message author
+            content: Message content
+        """
+        cached = await self._load(conversation_id)
+        history = cached.history
+        message = {"role": role, "content": content}
+        history.append(message)
+        del history[: -self.max_messages]
+        self._local[conversation_id] = _Cached(history, cached.version + 1)
+
+        if get_redis() is None:
+            return
+
+        await _persist(
+            _Write(
+                self._key(conversation_id),
+                orjson.dumps(message),
+                self.max_messages,
+                self.ttl,
+            )
+        )
+
+    async def clear(self, conversation_id: str) -> bool:
+        """
+        Remove a conversation from the store.
+
+        Args:
+            conversation_id: The conversation ID to clear
+
+        Returns:
+            True if conversation was cleared, False if it didn't exist
+        """
+        existed = self._local.pop(conversation_id, None) is not None
+
+        client = get_redis()
+        if client is None:
+            return existed
+
+        key = self._key(conversation_id)
+        if not existed:
+            try:
+                existed = await client.exists(key) > 0
+            except Exception as e:
+                logger.warning(
+                    "Failed to check conversation %s in Redis: %s",
+                    conversation_id,
+                    e,
+                )
+
+        # Deletes go through the same queue so they land after any pending
+        # appends for the conversation
+        await _persist(_Write(key, None, self.max_messages, self.ttl))
+        return existed
@@ -1,12 +1,53 @@
 import asyncio
 import logging
+import os
+import re
 import uuid
-from typing import Dict, Optional
+from typing import Optional
+
+from .conversation_store import ConversationStore, LRUMapping
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Canned responses by intent, in priority order (first match wins)
+KEYWORD_RESPONSES = {
+    "greeting": "Hello! How can I assist you today?",
+    "how_are_you": "I'm doing well, thank you for asking! How can I help you?",
+    "goodbye": "Goodbye! Feel free to chat with me anytime.",
+    "help": "I'm here to help! You can ask me questions or just have a conversation. What would you like to know?",
+    "name": "I'm an AI assistant created to help answer questions and have conversations. What's your name?",
+}
+
+# Keywords that trigger each intent
+KEYWORDS = {
+    "greeting": ("hello", "hi"),
+    "how_are_you": ("how are you",),
+    "goodbye": ("goodbye", "bye"),
+    "help": ("help",),
+    "name": ("name",),
+}
+
+INTENT_PRIORITY = {intent: i for i, intent in enumerate(KEYWORD_RESPONSES)}
+
+# All keywords in one case-insensitive pattern, one named group per intent
+KEYWORD_PATTERN = re.compile(
+    "|".join(
+        f"(?P<{intent}>{'|'.join(map(re.escape, words))})"
+        for intent, words in KEYWORDS.items()
+    ),
+    re.IGNORECASE,
+)
+
+# Generic response templates, rotated by conversation length
+GENERIC_RESPONSES = (
+    "That's interesting! I understand you said: '{msg}'. Could you tell me more about that?",
+    "Thanks for sharing that with me. I find your message about '{snippet}...' quite engaging.",
+    "I appreciate your message. As an AI assistant, I'm here to help with any questions you might have.",
+    "That's a thoughtful message. Is there anything specific you'd like to know or discuss further?",
+    "Thank you for the conversation! I'm enjoying our chat. What else would you like to talk about?",
+)
+
 
 class DummyAIService:
     """
@@ -15,7 +56,21 @@ class DummyAIService:
     """
 
     def __init__(self):
-        self.conversations: Dict[str, list] = {}
+        self.conversations = ConversationStore("dummy")
+
+        # Turns taken per conversation, used to rotate the generic replies
+        self._turns = LRUMapping(
+            int(os.getenv("CONVERSATIONS_LRU_CAP", "10000")),
+            self.conversations.ttl,
+        )
+
+        # Optional artificial delay to mimic a real AI service (seconds);
+        # DUMMY_SIM_LATENCY is still read for existing .env files
+        self._simulated_delay = float(
+            os.getenv(
+                "DUMMY_AI_DELAY_SECONDS", os.getenv("DUMMY_SIM_LATENCY", "0")
+            )
+        )
 
     async def process_message(
         self, message: str, conversation_id: Optional[str] = None
@@ -33,35 +88,34 @@ class DummyAIService:
         try:
             # Generate conversation ID if not provided
             if not conversation_id:
-                conversation_id = str(uuid.uuid4())
-
-            # Initialize conversation history if new
-            if conversation_id not in self.conversations:
-                self.conversations[conversation_id] = []
-
-            # Add user message to conversation history
-            self.conversations[conversation_id].append(
-                {"role": "user", "message": message}
-            )
-
-            # Simulate AI processing time
-            await asyncio.sleep(0.5)
-
-            # Generate mock AI response
-            ai_response = await self._generate_response(
-                message, conversation_id
-            )
-
-            # Add AI response to conversation history
-            self.conversations[conversation_id].append(
-                {"role": "assistant", "message": ai_response}
-            )
-
-            logger.info(
-                "Successfully processed message for conversation %s",
-                conversation_id,
-            )
-            return ai_response, conversation_id
+                conversation_id = uuid.uuid4().hex
+
+            # Serialize turns within a conversation so history stays ordered
+            async with self.conversations.lock(conversation_id):
+                # Add user message to conversation history
+                await self.conversations.append(
+                    conversation_id, "user", message
+                )
+
+                # Simulate AI processing time if configured
+                if self._simulated_delay:
+                    await asyncio.sleep(self._simulated_delay)
+
+                # Generate mock AI response
+                ai_response = await self._generate_response(
+                    message, conversation_id
+                )
+
+                # Add AI response to conversation history
+                await self.conversations.append(
+                    conversation_id, "assistant", ai_response
+                )
+
+                logger.info(
+                    "Successfully processed message for conversation %s",
+                    conversation_id,
+                )
+                return ai_response, conversation_id
 
         except Exception as e:
             logger.error("Error processing message: %s", str(e))
@@ -74,36 +128,22 @@ class DummyAIService:
         Generate AI response. This is a mock implementation.
         Replace this method with actual AI service integration.
         """
-        # Simple mock responses based on message content
-        message_lower = message.lower()
-
-        if "hello" in message_lower or "hi" in message_lower:
-            return "Hello! How can I assist you today?"
-
-        elif "how are you" in message_lower:
-            return "I'm doing well, thank you for asking! How can I help you?"
-
-        elif "goodbye" in message_lower or "bye" in message_lower:
-            return "Goodbye! Feel free to chat with me anytime."
-
-        elif "help" in message_lower:
-            return "I'm here to help! You can ask me questions or just have a conversation. What would you like to know?"
-
-        elif "name" in message_lower:
-            return "I'm an AI assistant created to help answer questions and have conversations. What's your name?"
-
-        else:
-            # Generic response for other messages
-            conversation_length = len(
-                self.conversations.get(conversation_id, [])
-            )
-            responses = [
-                f"That's interesting! I understand you said: '{message}'. Could you tell me more about that?",
-                f"Thanks for sharing that with me. I find your message about '{message[:50]}...' quite engaging.",
-                f"I appreciate your message. As an AI assistant, I'm here to help with any questions you might have.",
-                f"That's a thoughtful message. Is there anything specific you'd like to know or discuss further?",
-                f"Thank you for the conversation! I'm enjoying our chat. What else would you like to talk about?",
-            ]
-
-            # Rotate responses based on conversation length
-            return responses[conversation_length % len(responses)]
+        # Count every turn; the stored history stops growing at its cap, so
+        # its length cannot drive the rotation
+        turn = self._turns.get(conversation_id, 0) + 1
+        self._turns[conversation_id] = turn
+
+        # Simple mock responses based on message content, matching all
+        # keywords in a single pass
+        intent = min(
+            (m.lastgroup for m in KEYWORD_PATTERN.finditer(message)),
+            key=INTENT_PRIORITY.__getitem__,
+            default=None,
+        )
+
+        if intent is not None:
+            return KEYWORD_RESPONSES[intent]
+
+        # Generic response for other messages, rotated by turn
+        template = GENERIC_RESPONSES[turn % len(GENERIC_RESPONSES)]
+        return template.format_map({"msg": message, "snippet": message[:50]})
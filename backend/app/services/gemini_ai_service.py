@@ -1,14 +1,39 @@
+import asyncio
 import logging
 import os
 import uuid
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from google.generativeai.types import generation_types
+
+from .conversation_store import ConversationStore, LRUMapping
+from .prompt_cache import PromptCache
+from .request_coalescer import RequestCoalescer
+from .retry import provider_retry
+from .token_bucket import TokenBucket, estimate_tokens
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SYSTEM_INSTRUCTION = "You are a helpful AI assistant. Be concise, friendly, and helpful in your responses."
+
+# Finish reasons of a reply that completed normally
+COMPLETE_FINISH_REASONS = {"FINISH_REASON_UNSPECIFIED", "STOP", "MAX_TOKENS"}
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Retry rate limits, timeouts and server errors."""
+    return isinstance(
+        exc,
+        (
+            google_exceptions.TooManyRequests,
+            google_exceptions.DeadlineExceeded,
+            google_exceptions.ServerError,
+        ),
+    )
+
 
 class GeminiAIService:
     """
@@ -16,7 +41,19 @@ class GeminiAIService:
     """
 
     def __init__(self):
-        self.conversations: Dict[str, List[Dict[str, str]]] = {}
+        self.conversations = ConversationStore("gemini")
+        self._inflight = RequestCoalescer()
+
+        # Responses to identical recent prompts are reused
+        self._prompt_cache = PromptCache()
+
+        # Live chat sessions by conversation ID, rebuilt from the store when
+        # evicted, expired or out of step with it (e.g. after another worker
+        # served a turn)
+        self._chats = LRUMapping(
+            int(os.getenv("CONVERSATIONS_LRU_CAP", "10000")),
+            self.conversations.ttl,
+        )
 
         # Initialize Gemini client
         api_key = os.getenv("GEMINI_API_KEY")
@@ -31,6 +68,17 @@ class GeminiAIService:
         self.max_output_tokens = int(
             os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "150")
         )
+        self.timeout = float(os.getenv("GEMINI_TIMEOUT", "30"))
+
+        # Cap concurrent API calls so bursts queue locally instead of
+        # triggering provider rate limits
+        self._semaphore = asyncio.Semaphore(
+            int(os.getenv("GEMINI_MAX_INFLIGHT", "20"))
+        )
+        self._rate_limit = TokenBucket(
+            rpm=int(os.getenv("GEMINI_RPM", "60")),
+            tpm=int(os.getenv("GEMINI_TPM", "32000")),
+        )
 
         # Initialize the model
         generation_config = genai.types.GenerationConfig(
@@ -41,6 +89,7 @@ class GeminiAIService:
         self.model = genai.GenerativeModel(
             model_name=self.model_name,
             generation_config=generation_config,
+            system_instruction=SYSTEM_INSTRUCTION,
         )
 
         logger.info(
@@ -62,84 +111,177 @@ class GeminiAIService:
         """
         try:
             # Generate conversation ID if not provided
-            if not conversation_id:
-                conversation_id = str(uuid.uuid4())
+            is_new_conversation = not conversation_id
+            if is_new_conversation:
+                conversation_id = uuid.uuid4().hex
+
+            # Serialize turns within a conversation so history stays ordered
+            async with self.conversations.lock(conversation_id):
+                # Generate AI response using Gemini. Identical first messages
+                # arriving concurrently share a single API call.
+                if is_new_conversation:
+                    ai_response = await self._inflight.run(
+                        RequestCoalescer.key(message),
+                        lambda: self._generate_gemini_response(
+                            conversation_id, message
+                        ),
+                    )
+                else:
+                    ai_response = await self._generate_gemini_response(
+                        conversation_id, message
+                    )
+
+                # Add the exchange to conversation history. Empty replies are
+                # not stored, since providers reject empty model turns.
+                if ai_response:
+                    await self.conversations.append(
+                        conversation_id, "user", message
+                    )
+                    await self.conversations.append(
+                        conversation_id, "model", ai_response
+                    )
+                else:
+                    self._chats.pop(conversation_id, None)
+
+                logger.info(
+                    "Successfully processed message for conversation %s",
+                    conversation_id,
+                )
+                return ai_response, conversation_id
 
-            # Initialize conversation history if new
-            if conversation_id not in self.conversations:
-                self.conversations[conversation_id] = []
+        except Exception as e:
+            logger.error("Error processing message: %s", str(e))
+            # Return a fallback message instead of raising an exception
+            fallback_response = "I apologize, but I'm experiencing some technical difficulties right now. Please try again in a moment."
+            return fallback_response, conversation_id or uuid.uuid4().hex
 
-            # Add user message to conversation history
-            self.conversations[conversation_id].append(
-                {"role": "user", "content": message}
-            )
+    async def stream_message(
+        self, message: str, conversation_id: str
+    ) -> AsyncIterator[str]:
+        """
+        Process a user message and stream the AI response as it is generated.
 
-            # Generate AI response using Gemini
-            ai_response = await self._generate_gemini_response(conversation_id)
+        The exchange is added to the conversation history once the stream
+        ends, so history is written once per turn rather than per token.
 
-            # Add AI response to conversation history
-            self.conversations[conversation_id].append(
-                {"role": "model", "content": ai_response}
-            )
+        Args:
+            message: User message to process
+            conversation_id: Conversation ID
+
+        Yields:
+            Chunks of the AI response text
+        """
+        # Serialize turns within a conversation so history stays ordered
+        async with self.conversations.lock(conversation_id):
+            history = await self.conversations.get(conversation_id)
+            chat = await self._get_chat(conversation_id)
+
+            # Reading the session history rebuilds it from the last response
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Streaming from Gemini API with %d history messages",
+                    len(chat.history),
+                )
+
+            chunks: List[str] = []
+            try:
+                response = await self._send_message(
+                    chat,
+                    message,
+                    estimate_tokens(
+                        [*history, {"content": message}],
+                        self.max_output_tokens,
+                    ),
+                    stream=True,
+                )
+                try:
+                    async for chunk in response:
+                        # Chunks without parts (e.g. only a finish reason) have
+                        # no text
+                        if chunk.parts:
+                            chunks.append(chunk.text)
+                            yield chunk.text
+                finally:
+                    self._semaphore.release()
+            except BaseException:
+                # An interrupted stream leaves the session without this turn's
+                # reply, so rebuild it from the stored history next time
+                self._chats.pop(conversation_id, None)
+                raise
+
+            # Streams skip the SDK's finish reason check, so a blocked reply
+            # (e.g. for SAFETY) would leave the session unable to continue
+            ai_response = "".join(chunks).strip()
+            if not ai_response or not self._is_complete(response):
+                self._chats.pop(conversation_id, None)
+
+            # Add the exchange to conversation history. Empty replies are not
+            # stored, since providers reject empty model turns.
+            if ai_response:
+                await self.conversations.append(
+                    conversation_id, "user", message
+                )
+                await self.conversations.append(
+                    conversation_id, "model", ai_response
+                )
 
             logger.info(
-                "Successfully processed message for conversation %s",
+                "Successfully streamed message for conversation %s",
                 conversation_id,
             )
-            return ai_response, conversation_id
-
-        except Exception as e:
-            logger.error("Error processing message: %s", str(e))
-            # Return a fallback message instead of raising an exception
-            fallback_response = "I apologize, but I'm experiencing some technical difficulties right now. Please try again in a moment."
-            return fallback_response, conversation_id or str(uuid.uuid4())
 
-    async def _generate_gemini_response(self, conversation_id: str) -> str:
+    async def _generate_gemini_response(
+        self, conversation_id: str, message: str
+    ) -> str:
         """
         Generate AI response using Google Gemini's API.
 
         Args:
             conversation_id: The conversation ID to get history for
+            message: The new user message
 
         Returns:
             AI response string
         """
         try:
-            # Get conversation history
-            messages = self.conversations.get(conversation_id, [])
-
-            # Build conversation context for Gemini
-            if len(messages) == 1:  # Only user message exists
-                # Add system context for first message
-                context = "You are a helpful AI assistant. Be concise, friendly, and helpful in your responses."
-                prompt = (
-                    f"{context}\n\nUser: {messages[0]['content']}\nAssistant:"
-                )
-            else:
-                # Build conversation history
-                prompt_parts = [
-                    "You are a helpful AI assistant. Be concise, friendly, and helpful in your responses.\n"
-                ]
-
-                for msg in messages[:-1]:  # All except the last message
-                    if msg["role"] == "user":
-                        prompt_parts.append(f"User: {msg['content']}")
-                    elif msg["role"] == "model":
-                        prompt_parts.append(f"Assistant: {msg['content']}")
-
-                # Add the current user message
-                prompt_parts.append(f"User: {messages[-1]['content']}")
-                prompt_parts.append("Assistant:")
+            history = await self.conversations.get(conversation_id)
+
+            cache_key = PromptCache.key(
+                self.model_name,
+                self.temperature,
+                self.max_output_tokens,
+                history,
+                message,
+            )
+            cached_response = self._prompt_cache.get(cache_key)
+            if cached_response is not None:
+                logger.info("Using cached Gemini response")
+                # The chat session missed this turn, so rebuild it from the
+                # stored history next time
+                self._chats.pop(conversation_id, None)
+                return cached_response
 
-                prompt = "\n".join(prompt_parts)
+            chat = await self._get_chat(conversation_id)
 
             # Call Gemini API
-            logger.info("Calling Gemini API with conversation history")
+            # Reading the session history rebuilds it from the last response
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Calling Gemini API with %d history messages",
+                    len(chat.history),
+                )
 
-            response = self.model.generate_content(prompt)
+            response = await self._send_message(
+                chat,
+                message,
+                estimate_tokens(
+                    [*history, {"content": message}], self.max_output_tokens
+                ),
+            )
 
             # Extract response content
             ai_response = response.text.strip()
+            self._prompt_cache.set(cache_key, ai_response)
 
             logger.info("Gemini API response received successfully")
             return ai_response
@@ -148,7 +290,110 @@ class GeminiAIService:
             logger.error("Error calling Gemini API: %s", str(e))
             raise Exception("Failed to generate AI response") from e
 
-    def get_conversation_history(
+    @provider_retry(_is_retryable)
+    async def _send_message(
+        self,
+        chat: genai.ChatSession,
+        message: str,
+        tokens: int,
+        stream: bool = False,
+    ):
+        """
+        Send a message in a chat session, retrying transient errors.
+
+        A failed send leaves the session history unchanged, so it is safe to
+        repeat. Each attempt waits for its own share of the rate budget
+        (tokens) and an in-flight slot, and a failed attempt gives the slot
+        back before backing off. A stream is only retried while it is being
+        opened, and its slot stays held until the caller releases the
+        semaphore.
+        """
+        await self._rate_limit.acquire(tokens)
+        await self._semaphore.acquire()
+        try:
+            response = await chat.send_message_async(
+                message,
+                stream=stream,
+                request_options={"timeout": self.timeout},
+            )
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        if not stream:
+            self._semaphore.release()
+        return response
+
+    @staticmethod
+    def _is_complete(response) -> bool:
+        """
+        Check whether a finished response ended normally.
+        """
+        candidates = response.candidates
+        return bool(candidates) and (
+            candidates[0].finish_reason.name in COMPLETE_FINISH_REASONS
+        )
+
+    async def _get_chat(self, conversation_id: str) -> genai.ChatSession:
+        """
+        Get the chat session for a conversation, creating it from the stored
+        history if needed.
+
+        The stored history is the source of truth, so a cached session is
+        only reused while it holds the same messages.
+
+        Args:
+            conversation_id: The conversation ID
+
+        Returns:
+            The conversation's chat session
+        """
+        messages = await self.conversations.get(conversation_id)
+        chat = self._chats.get(conversation_id)
+        if chat is not None:
+            try:
+                history = chat.history
+            except generation_types.BrokenResponseError:
+                # The session's last reply was cut off or blocked
+                logger.warning(
+                    "Rebuilding broken Gemini chat for conversation %s",
+                    conversation_id,
+                )
+                chat = None
+
+        if chat is not None:
+            # The session keeps every turn it has sent, so trim it to the
+            # window the store keeps. This bounds the prompt and keeps it
+            # equal to the stored history used for the token estimate.
+            max_messages = self.conversations.max_messages
+            if len(history) > max_messages:
+                history = history[-max_messages:]
+                chat.history = history
+            if self._matches(history, messages):
+                return chat
+
+        chat = self.model.start_chat(
+            history=[
+                {"role": msg["role"], "parts": [msg["content"]]}
+                for msg in messages
+            ]
+        )
+        self._chats[conversation_id] = chat
+        return chat
+
+    @staticmethod
+    def _matches(history, messages: List[Dict[str, str]]) -> bool:
+        """
+        Check whether a chat session's history holds the stored messages.
+        """
+        return len(history) == len(messages) and all(
+            content.role == msg["role"]
+            and "".join(part.text for part in content.parts).strip()
+            == msg["content"]
+            for content, msg in zip(history, messages)
+        )
+
+    async def get_conversation_history(
         self, conversation_id: str
     ) -> List[Dict[str, str]]:
         """
@@ -160,9 +405,9 @@ class GeminiAIService:
         Returns:
             List of conversation messages
         """
-        return self.conversations.get(conversation_id, [])
+        return await self.conversations.get(conversation_id)
 
-    def clear_conversation(self, conversation_id: str) -> bool:
+    async def clear_conversation(self, conversation_id: str) -> bool:
         """
         Clear conversation history for a given conversation ID.
 
@@ -172,8 +417,8 @@ class GeminiAIService:
         Returns:
             True if conversation was cleared, False if it didn't exist
         """
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        self._chats.pop(conversation_id, None)
+        cleared = await self.conversations.clear(conversation_id)
+        if cleared:
             logger.info("Cleared conversation %s", conversation_id)
-            return True
-        return False
+        return cleared
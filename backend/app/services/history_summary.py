@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .conversation_store import LRUMapping
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SUMMARY_INSTRUCTION = "Summarize the conversation below in a few sentences. Keep facts, names, decisions and open questions that later replies may need."
+
+# Output budget for each summary
+SUMMARY_MAX_TOKENS = 200
+
+Summarize = Callable[[str], Awaitable[str]]
+
+
+def format_transcript(
+    previous_summary: Optional[str], messages: List[Dict[str, str]]
+) -> str:
+    """
+    Render the text to be summarized, folding in the previous summary.
+    """
+    lines = []
+    if previous_summary:
+        lines.append(f"Earlier summary: {previous_summary}\n")
+    for msg in messages:
+        speaker = "User" if msg["role"] == "user" else "Assistant"
+        lines.append(f"{speaker}: {msg['content']}")
+    return "\n".join(lines)
+
+
+class HistorySummarizer:
+    """
+    Sliding window over conversation history with a rolling summary of the
+    messages that have left it.
+
+    Only the most recent messages are sent verbatim. Older messages are
+    folded into a summary generated in the background, so no request waits
+    on it; until it is ready, older context is simply dropped. The summary
+    is only regenerated once the window has moved on by half its size.
+    """
+
+    def __init__(self, summarize: Summarize, window: int, enabled: bool):
+        """
+        Args:
+            summarize: Coroutine function turning a transcript into a summary
+            window: Number of recent messages always sent verbatim
+            enabled: Whether to summarize older messages at all
+        """
+        self._summarize = summarize
+        self.window = window
+        self.step = max(window // 2, 1)
+        self.enabled = enabled
+        # Conversation ID -> (summary, last message it covers)
+        self._summaries = LRUMapping(
+            int(os.getenv("CONVERSATIONS_LRU_CAP", "10000")),
+            int(os.getenv("CONVERSATION_TTL_SECONDS", "3600")),
+        )
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    def apply(
+        self, conversation_id: str, history: List[Dict[str, str]]
+    ) -> Tuple[Optional[str], List[Dict[str, str]]]:
+        """
+        Select the context to send for a conversation.
+
+        Args:
+            conversation_id: The conversation ID
+            history: The full stored history
+
+        Returns:
+            Tuple of (summary of older messages or None, recent messages)
+        """
+        prefix_len = len(history) - self.window
+        if prefix_len <= 0:
+            return None, history
+        if not self.enabled:
+            return None, history[prefix_len:]
+
+        summary, covered = None, -1
+        entry = self._summaries.get(conversation_id)
+        if entry is not None:
+            summary, last_message = entry
+            covered = self._find(history, last_message, prefix_len)
+
+        # Messages between the summary and the window
+        uncovered = history[covered + 1 : prefix_len]
+        if summary is None or covered < 0 or len(uncovered) >= self.step:
+            self._refresh(conversation_id, summary, uncovered)
+
+        if summary is not None and covered >= 0:
+            return summary, history[covered + 1 :]
+        return summary, history[prefix_len:]
+
+    def forget(self, conversation_id: str) -> None:
+        """
+        Drop the summary for a cleared conversation.
+        """
+        self._summaries.pop(conversation_id, None)
+        task = self._pending.pop(conversation_id, None)
+        if task is not None:
+            task.cancel()
+
+    @staticmethod
+    def _find(
+        history: List[Dict[str, str]], message: Dict[str, str], end: int
+    ) -> int:
+        """
+        Find the latest index before end holding the given message, or -1.
+        """
+        for index in range(end - 1, -1, -1):
+            if history[index] == message:
+                return index
+        return -1
+
+    def _refresh(
+        self,
+        conversation_id: str,
+        previous_summary: Optional[str],
+        messages: List[Dict[str, str]],
+    ) -> None:
+        """
+        Start summarizing in the background unless a run is in progress.
+        """
+        if not messages or conversation_id in self._pending:
+            return
+
+        task = asyncio.create_task(
+            self._run(conversation_id, previous_summary, messages)
+        )
+        self._pending[conversation_id] = task
+
+        def done(finished: asyncio.Task) -> None:
+            if self._pending.get(conversation_id) is finished:
+                del self._pending[conversation_id]
+
+        task.add_done_callback(done)
+
+    async def _run(
+        self,
+        conversation_id: str,
+        previous_summary: Optional[str],
+        messages: List[Dict[str, str]],
+    ) -> None:
+        try:
+            summary = await self._summarize(
+                format_transcript(previous_summary, messages)
+            )
+        except Exception as e:
+            logger.warning(
+                "Failed to summarize conversation %s: %s", conversation_id, e
+            )
+            return
+
+        self._summaries[conversation_id] = (summary, messages[-1])
+        logger.info("Updated summary for conversation %s", conversation_id)
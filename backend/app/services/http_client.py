@@ -0,0 +1,48 @@
+import logging
+import os
+from typing import Optional
+
+import httpx
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide HTTP client shared by the AI provider SDKs.
+
+    The client is created on first use so it is never built at import time.
+    Sharing it keeps TLS connections alive across requests and providers,
+    and HTTP/2 lets concurrent requests multiplex over one connection.
+    """
+    global _http_client
+
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("HTTPX_MAX_CONNECTIONS", "500")),
+                max_keepalive_connections=int(
+                    os.getenv("HTTPX_MAX_KEEPALIVE", "200")
+                ),
+                keepalive_expiry=30.0,
+            ),
+        )
+        logger.info("Created shared HTTP client")
+
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """
+    Close the shared HTTP client if it has been created.
+    """
+    global _http_client
+
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
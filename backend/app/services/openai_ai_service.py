@@ -1,14 +1,44 @@
+import asyncio
 import logging
 import os
+import threading
 import uuid
-from typing import Dict, List, Optional
-
-from openai import AsyncOpenAI
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+import orjson
+import tiktoken
+from openai import APIConnectionError, AsyncOpenAI
+
+from .conversation_store import ConversationStore
+from .history_summary import (
+    SUMMARY_INSTRUCTION,
+    SUMMARY_MAX_TOKENS,
+    HistorySummarizer,
+)
+from .http_client import get_http_client
+from .prompt_cache import PromptCache
+from .request_coalescer import RequestCoalescer
+from .retry import is_retryable_status, provider_retry
+from .token_bucket import TokenBucket, estimate_tokens
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a helpful AI assistant. Be concise, friendly, and helpful in your responses.",
+}
+
+# Number of message texts whose token counts are remembered
+TOKEN_COUNT_CACHE_SIZE = 10000
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Retry connection errors, rate limits and server errors."""
+    return isinstance(exc, APIConnectionError) or is_retryable_status(exc)
+
 
 class OpenAIAIService:
     """
@@ -16,21 +46,113 @@ class OpenAIAIService:
     """
 
     def __init__(self):
-        self.conversations: Dict[str, List[Dict[str, str]]] = {}
+        self.conversations = ConversationStore("openai")
+        self._inflight = RequestCoalescer()
 
         # Initialize OpenAI client
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
 
-        self.client = AsyncOpenAI(api_key=api_key)
+        # The SDK client is created on first use; see the client property
+        self._api_key = api_key
+        self._client: Optional[AsyncOpenAI] = None
+        self._client_http: Optional[httpx.AsyncClient] = None
 
         # Configuration from environment
         self.model = os.getenv("OPENAI_MODEL", "gpt-4o")
         self.temperature = float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
-
+        self.max_history_messages = int(
+            os.getenv("OPENAI_MAX_HISTORY_MESSAGES", "20")
+        )
+        self.max_context_tokens = int(
+            os.getenv("OPENAI_MAX_CONTEXT_TOKENS", "8000")
+        )
+
+        # Messages stay in the window for many turns, so remember their
+        # token counts instead of re-tokenizing them on every request
+        self._count_tokens = lru_cache(maxsize=TOKEN_COUNT_CACHE_SIZE)(
+            self._count_tokens
+        )
+
+        # Loading the tokenizer may download its BPE file, which tiktoken
+        # does without a timeout, so it is loaded in the background. Token
+        # counts are estimated from message length until it is ready.
+        self.encoding: Optional[tiktoken.Encoding] = None
+        threading.Thread(
+            target=self._load_encoding, name="tiktoken-loader", daemon=True
+        ).start()
+
+        # Responses to identical recent prompts are reused
+        self._prompt_cache = PromptCache()
+
+        # Older messages beyond the window are replaced by a rolling summary
+        self.summarizer = HistorySummarizer(
+            self._summarize,
+            window=self.max_history_messages,
+            enabled=os.getenv("OPENAI_SUMMARIZE_HISTORY", "True").lower()
+            == "true",
+        )
+
+        # Cap concurrent API calls so bursts queue locally instead of
+        # triggering provider rate limits
+        self._semaphore = asyncio.Semaphore(
+            int(os.getenv("OPENAI_MAX_INFLIGHT", "20"))
+        )
+        self._rate_limit = TokenBucket(
+            rpm=int(os.getenv("OPENAI_RPM", "500")),
+            tpm=int(os.getenv("OPENAI_TPM", "30000")),
+        )
         logger.info("AIService initialized with OpenAI model: %s", self.model)
 
+    @property
+    def client(self) -> AsyncOpenAI:
+        """
+        The OpenAI client, bound to the current shared HTTP client.
+
+        It is created on first use rather than when the service is, and
+        rebuilt once the shared HTTP client has been closed and replaced
+        (e.g. when the app is restarted within the same process).
+        """
+        http_client = get_http_client()
+        if self._client is None or self._client_http is not http_client:
+            self._client = AsyncOpenAI(
+                api_key=self._api_key, http_client=http_client, max_retries=0
+            )
+            self._client_http = http_client
+        return self._client
+
+    def _load_encoding(self) -> None:
+        """
+        Load the tokenizer for the configured model.
+
+        Models unknown to tiktoken use the o200k_base encoding. If no
+        encoding can be loaded, token counts stay estimated from message
+        length.
+        """
+        try:
+            try:
+                encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(
+                "Failed to load tokenizer for %s: %s", self.model, e
+            )
+            return
+
+        self.encoding = encoding
+        # Drop counts estimated while the tokenizer was loading
+        self._count_tokens.cache_clear()
+
+    def _count_tokens(self, text: str) -> int:
+        """
+        Count the tokens in a piece of text.
+        """
+        if self.encoding is None:
+            return len(text) // 4 + 1
+        return len(self.encoding.encode(text))
+
     async def process_message(
         self, message: str, conversation_id: Optional[str] = None
     ) -> tuple[str, str]:
@@ -46,37 +168,165 @@ class OpenAIAIService:
         """
         try:
             # Generate conversation ID if not provided
-            if not conversation_id:
-                conversation_id = str(uuid.uuid4())
+            is_new_conversation = not conversation_id
+            if is_new_conversation:
+                conversation_id = uuid.uuid4().hex
+
+            # Serialize turns within a conversation so history stays ordered
+            async with self.conversations.lock(conversation_id):
+                # Add user message to conversation history
+                await self.conversations.append(
+                    conversation_id, "user", message
+                )
+
+                # Generate AI response using OpenAI. Identical first messages
+                # arriving concurrently share a single API call.
+                if is_new_conversation:
+                    ai_response = await self._inflight.run(
+                        RequestCoalescer.key(message),
+                        lambda: self._generate_openai_response(
+                            conversation_id
+                        ),
+                    )
+                else:
+                    ai_response = await self._generate_openai_response(
+                        conversation_id
+                    )
+
+                # Add AI response to conversation history. Empty replies are
+                # not stored, since providers reject empty assistant turns.
+                if ai_response:
+                    await self.conversations.append(
+                        conversation_id, "assistant", ai_response
+                    )
+
+                logger.info(
+                    "Successfully processed message for conversation %s",
+                    conversation_id,
+                )
+                return ai_response, conversation_id
 
-            # Initialize conversation history if new
-            if conversation_id not in self.conversations:
-                self.conversations[conversation_id] = []
+        except Exception as e:
+            logger.error("Error processing message: %s", str(e))
+            # Return a fallback message instead of raising an exception
+            fallback_response = "I apologize, but I'm experiencing some technical difficulties right now. Please try again in a moment."
+            return fallback_response, conversation_id or uuid.uuid4().hex
+
+    async def stream_message(
+        self, message: str, conversation_id: str
+    ) -> AsyncIterator[str]:
+        """
+        Process a user message and stream the AI response as it is generated.
+
+        The complete response is added to the conversation history once the
+        stream ends, so history is written once per turn rather than per token.
+
+        Args:
+            message: User message to process
+            conversation_id: Conversation ID
 
+        Yields:
+            Chunks of the AI response text
+        """
+        # Serialize turns within a conversation so history stays ordered
+        async with self.conversations.lock(conversation_id):
             # Add user message to conversation history
-            self.conversations[conversation_id].append(
-                {"role": "user", "content": message}
-            )
+            await self.conversations.append(conversation_id, "user", message)
 
-            # Generate AI response using OpenAI
-            ai_response = await self._generate_openai_response(conversation_id)
+            messages = await self._build_messages(conversation_id)
 
-            # Add AI response to conversation history
-            self.conversations[conversation_id].append(
-                {"role": "assistant", "content": ai_response}
+            logger.info(
+                "Streaming from OpenAI API with %d messages", len(messages)
             )
 
+            chunks: List[str] = []
+            stream = await self._create_completion(messages, stream=True)
+            try:
+                # Closing the stream early (e.g. on client disconnect) stops
+                # generation on the provider side
+                async with stream:
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        content = chunk.choices[0].delta.content
+                        if content:
+                            chunks.append(content)
+                            yield content
+            finally:
+                self._semaphore.release()
+
+            # Add AI response to conversation history. Empty replies are not
+            # stored, since providers reject empty assistant turns.
+            ai_response = "".join(chunks).strip()
+            if ai_response:
+                await self.conversations.append(
+                    conversation_id, "assistant", ai_response
+                )
+
             logger.info(
-                "Successfully processed message for conversation %s",
+                "Successfully streamed message for conversation %s",
                 conversation_id,
             )
-            return ai_response, conversation_id
 
-        except Exception as e:
-            logger.error("Error processing message: %s", str(e))
-            # Return a fallback message instead of raising an exception
-            fallback_response = "I apologize, but I'm experiencing some technical difficulties right now. Please try again in a moment."
-            return fallback_response, conversation_id or str(uuid.uuid4())
+    async def _build_messages(
+        self, conversation_id: str
+    ) -> List[Dict[str, str]]:
+        """
+        Build the message list sent to OpenAI for a conversation.
+
+        Args:
+            conversation_id: The conversation ID to get history for
+
+        Returns:
+            List of messages in OpenAI chat format
+        """
+        # Get the most recent conversation history and any summary of the
+        # messages before it
+        history = await self.conversations.get(conversation_id)
+        summary, window = self.summarizer.apply(conversation_id, history)
+
+        prefix = [SYSTEM_MESSAGE]
+        total_tokens = self._count_tokens(SYSTEM_MESSAGE["content"])
+        if summary:
+            summary_message = {
+                "role": "system",
+                "content": f"Summary of the earlier conversation: {summary}",
+            }
+            prefix.append(summary_message)
+            total_tokens += self._count_tokens(summary_message["content"])
+
+        # Drop the oldest messages until the prompt fits the token budget,
+        # always keeping the latest user message
+        token_counts = [self._count_tokens(m["content"]) for m in window]
+        total_tokens += sum(token_counts)
+        start = 0
+        while (
+            total_tokens > self.max_context_tokens and start < len(window) - 1
+        ):
+            total_tokens -= token_counts[start]
+            start += 1
+
+        return prefix + window[start:]
+
+    async def _summarize(self, transcript: str) -> str:
+        """
+        Summarize part of a conversation for the history summarizer.
+
+        Args:
+            transcript: The conversation text to summarize
+
+        Returns:
+            Summary text
+        """
+        messages = [
+            {"role": "system", "content": SUMMARY_INSTRUCTION},
+            {"role": "user", "content": transcript},
+        ]
+
+        response = await self._create_completion(
+            messages, max_tokens=SUMMARY_MAX_TOKENS
+        )
+        return response.choices[0].message.content.strip()
 
     async def _generate_openai_response(self, conversation_id: str) -> str:
         """
@@ -89,28 +339,22 @@ class OpenAIAIService:
             AI response string
         """
         try:
-            # Get conversation history
-            messages = self.conversations.get(conversation_id, [])
-
-            # Add system message if this is the start of conversation
-            if len(messages) == 1:  # Only user message exists
-                system_message = {
-                    "role": "system",
-                    "content": "You are a helpful AI assistant. Be concise, friendly, and helpful in your responses.",
-                }
-                messages = [system_message] + messages
+            messages = await self._build_messages(conversation_id)
+
+            cache_key = PromptCache.key(self.model, self.temperature, messages)
+            cached_response = self._prompt_cache.get(cache_key)
+            if cached_response is not None:
+                logger.info("Using cached OpenAI response")
+                return cached_response
 
             # Call OpenAI API
             logger.info("Calling OpenAI API with %d messages", len(messages))
 
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature,
-            )
+            response = await self._create_completion(messages)
 
             # Extract response content
             ai_response = response.choices[0].message.content.strip()
+            self._prompt_cache.set(cache_key, ai_response)
 
             logger.info("OpenAI API response received successfully")
             return ai_response
@@ -119,7 +363,134 @@ class OpenAIAIService:
             logger.error("Error calling OpenAI API: %s", str(e))
             raise Exception("Failed to generate AI response") from e
 
-    def get_conversation_history(
+    @provider_retry(_is_retryable)
+    async def _create_completion(
+        self, messages: List[Dict[str, str]], **kwargs
+    ):
+        """
+        Call the OpenAI Chat Completion API, retrying transient errors.
+
+        Each attempt waits for its own share of the rate budget and an
+        in-flight slot, and a failed attempt gives the slot back before
+        backing off. A stream is only retried while it is being opened, and
+        its slot stays held until the caller releases the semaphore.
+
+        Extra keyword arguments are passed through to the API.
+        """
+        await self._rate_limit.acquire(
+            estimate_tokens(messages, kwargs.get("max_tokens", 0))
+        )
+        await self._semaphore.acquire()
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                **kwargs,
+            )
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        if not kwargs.get("stream"):
+            self._semaphore.release()
+        return response
+
+    async def submit_batch(self, messages: List[str]) -> str:
+        """
+        Submit independent single-turn messages to the Batch API.
+
+        Batches are processed asynchronously at a lower cost than
+        interactive calls, and take up to 24 hours to complete.
+
+        Args:
+            messages: User messages, each answered without history
+
+        Returns:
+            The batch ID
+        """
+        lines = [
+            orjson.dumps(
+                {
+                    "custom_id": str(index),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": self.model,
+                        "messages": [
+                            SYSTEM_MESSAGE,
+                            {"role": "user", "content": message},
+                        ],
+                        "temperature": self.temperature,
+                    },
+                }
+            )
+            for index, message in enumerate(messages)
+        ]
+        batch_file = await self.client.files.create(
+            file=("batch.jsonl", b"\n".join(lines)), purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        logger.info(
+            "Submitted OpenAI batch %s with %d messages",
+            batch.id,
+            len(messages),
+        )
+        return batch.id
+
+    async def get_batch_results(
+        self, batch_id: str
+    ) -> Optional[List[Optional[str]]]:
+        """
+        Get the results of a submitted batch.
+
+        Args:
+            batch_id: The batch ID
+
+        Returns:
+            Responses in submission order (None for failed messages), or
+            None while the batch is still processing
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status not in ("completed", "failed", "expired", "cancelled"):
+            return None
+
+        total = batch.request_counts.total if batch.request_counts else 0
+        responses: List[Optional[str]] = [None] * total
+        if batch.output_file_id:
+            output = await self.client.files.content(batch.output_file_id)
+            for line in output.content.splitlines():
+                result = orjson.loads(line)
+                response = result.get("response")
+                if response and response["status_code"] == 200:
+                    choice = response["body"]["choices"][0]
+                    content = choice["message"]["content"] or ""
+                    responses[int(result["custom_id"])] = content.strip()
+        return responses
+
+    async def batch_process(
+        self, messages: List[str], poll_interval: float = 30.0
+    ) -> List[Optional[str]]:
+        """
+        Process messages through the Batch API and wait for them.
+
+        Args:
+            messages: User messages, each answered without history
+            poll_interval: Seconds between batch status checks
+
+        Returns:
+            Responses in submission order (None for failed messages)
+        """
+        batch_id = await self.submit_batch(messages)
+        while (responses := await self.get_batch_results(batch_id)) is None:
+            await asyncio.sleep(poll_interval)
+        return responses
+
+    async def get_conversation_history(
         self, conversation_id: str
     ) -> List[Dict[str, str]]:
         """
@@ -131,9 +502,9 @@ class OpenAIAIService:
         Returns:
             List of conversation messages
         """
-        return self.conversations.get(conversation_id, [])
+        return await self.conversations.get(conversation_id)
 
-    def clear_conversation(self, conversation_id: str) -> bool:
+    async def clear_conversation(self, conversation_id: str) -> bool:
         """
         Clear conversation history for a given conversation ID.
 
@@ -143,8 +514,8 @@ class OpenAIAIService:
         Returns:
             True if conversation was cleared, False if it didn't exist
         """
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        self.summarizer.forget(conversation_id)
+        cleared = await self.conversations.clear(conversation_id)
+        if cleared:
             logger.info("Cleared conversation %s", conversation_id)
-            return True
-        return False
+        return cleared
@@ -0,0 +1,69 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import orjson
+
+
+class PromptCache:
+    """
+    LRU cache of provider responses keyed by the exact request.
+
+    Identical prompts (same model, settings and messages) are answered from
+    memory instead of calling the provider again. Entries expire after a
+    TTL so repeated prompts still get fresh responses eventually. Lookups
+    and inserts never await, so the cache is safe to share between
+    coroutines without a lock.
+    """
+
+    def __init__(
+        self, maxsize: Optional[int] = None, ttl: Optional[float] = None
+    ):
+        self.maxsize = (
+            int(os.getenv("PROMPT_CACHE_SIZE", "1024"))
+            if maxsize is None
+            else maxsize
+        )
+        self.ttl = (
+            float(os.getenv("PROMPT_CACHE_TTL_SECONDS", "300"))
+            if ttl is None
+            else ttl
+        )
+        self._entries: "OrderedDict[bytes, tuple[float, str]]" = OrderedDict()
+
+    @staticmethod
+    def key(*parts: Any) -> bytes:
+        """
+        Build a compact cache key from JSON-serializable request parts.
+        """
+        return hashlib.blake2b(orjson.dumps(parts), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        """
+        Get a cached response, or None if missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, response = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return response
+
+    def set(self, key: bytes, response: str) -> None:
+        """
+        Cache a response, evicting the least recently used entries.
+        """
+        if self.maxsize <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
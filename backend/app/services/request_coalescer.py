@@ -0,0 +1,61 @@
+import asyncio
+import hashlib
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class RequestCoalescer:
+    """
+    Share one result between identical concurrent calls.
+
+    While a call for a key is in flight, later callers with the same key
+    await the first call's result instead of repeating the upstream work.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[bytes, asyncio.Future] = {}
+
+    @staticmethod
+    def key(*parts: str) -> bytes:
+        """
+        Build a compact coalescing key from string parts.
+        """
+        raw = "\x00".join(parts).encode()
+        return hashlib.blake2b(raw, digest_size=16).digest()
+
+    async def run(self, key: bytes, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run func, or wait for an in-flight call with the same key.
+
+        Args:
+            key: Key identifying identical calls
+            func: Coroutine factory performing the actual work
+
+        Returns:
+            The result of func, possibly shared with other callers
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.set_exception(
+                RuntimeError("Coalesced request was cancelled")
+            )
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+            if future.done() and not future.cancelled():
+                # Mark any exception as retrieved when nobody was waiting
+                future.exception()
@@ -0,0 +1,96 @@
+import logging
+import os
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+from tenacity import (
+    RetryCallState,
+    before_sleep_log,
+    retry,
+    retry_if_exception,
+    wait_random_exponential,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying besides 5xx
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+# Longest server-requested delay honoured before giving up on a call
+MAX_RETRY_AFTER_SECONDS = 60.0
+
+
+def is_retryable_status(exc: BaseException) -> bool:
+    """
+    Check whether a provider SDK status error is transient.
+
+    Works with the OpenAI and Anthropic SDKs, whose status errors expose the
+    HTTP status as ``status_code``.
+    """
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and (
+        status in RETRYABLE_STATUS_CODES or status >= 500
+    )
+
+
+def _retry_after(exc: Optional[BaseException]) -> Optional[float]:
+    """
+    Read the server-requested delay from an error response, if any.
+    """
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    try:
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms is not None:
+            return float(retry_after_ms) / 1000
+
+        retry_after = headers.get("retry-after")
+        if retry_after is None:
+            return None
+        try:
+            return float(retry_after)
+        except ValueError:
+            retry_at = parsedate_to_datetime(retry_after).timestamp()
+            return max(retry_at - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def provider_retry(retry_on: Callable[[BaseException], bool]):
+    """
+    Retry a provider API call on transient errors.
+
+    Waits for the server's Retry-After delay when one is sent, and otherwise
+    backs off exponentially with jitter. The last error is re-raised once
+    PROVIDER_RETRY_ATTEMPTS attempts have failed.
+
+    Args:
+        retry_on: Predicate selecting the errors worth retrying
+
+    Returns:
+        A decorator for async functions
+    """
+    backoff = wait_random_exponential(min=1, max=30)
+
+    def wait(retry_state: RetryCallState) -> float:
+        delay = _retry_after(retry_state.outcome.exception())
+        if delay is not None:
+            return min(delay, MAX_RETRY_AFTER_SECONDS)
+        return backoff(retry_state)
+
+    def stop(retry_state: RetryCallState) -> bool:
+        # Read at call time so values from .env are picked up
+        attempts = int(os.getenv("PROVIDER_RETRY_ATTEMPTS", "6"))
+        return retry_state.attempt_number >= attempts
+
+    return retry(
+        retry=retry_if_exception(retry_on),
+        wait=wait,
+        stop=stop,
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True,
+    )
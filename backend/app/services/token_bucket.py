@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import Dict, Iterable
+
+
+def estimate_tokens(
+    messages: Iterable[Dict[str, str]], max_output_tokens: int = 0
+) -> int:
+    """
+    Roughly estimate the tokens a request will consume.
+
+    Args:
+        messages: Messages sent to the provider
+        max_output_tokens: Output tokens the provider may generate
+
+    Returns:
+        Estimated prompt plus output tokens
+    """
+    return sum(len(m["content"]) for m in messages) // 4 + max_output_tokens
+
+
+class TokenBucket:
+    """
+    Client-side requests-per-minute and tokens-per-minute limiter.
+
+    Both budgets refill continuously. Callers wait in arrival order until
+    the request and its estimated tokens fit, so bursts are spread out
+    instead of being rejected by the provider. A limit of 0 disables it.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(
+                self.rpm, self._requests + elapsed * self.rpm / 60
+            )
+        if self.tpm:
+            self._tokens = min(
+                self.tpm, self._tokens + elapsed * self.tpm / 60
+            )
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """
+        Wait until one request using the given tokens fits the budgets.
+
+        Args:
+            tokens: Estimated tokens for the request
+        """
+        if not self.rpm and not self.tpm:
+            return
+
+        # A request larger than the whole budget only waits for a full bucket
+        tokens = min(tokens, self.tpm)
+
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.rpm and self._requests < 1:
+                    wait = (1 - self._requests) * 60 / self.rpm
+                if self.tpm and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tpm)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            if self.rpm:
+                self._requests -= 1
+            if self.tpm:
+                self._tokens -= tokens
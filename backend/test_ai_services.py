@@ -13,22 +13,32 @@ from dotenv import load_dotenv
 # Add the app directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), "app"))
 
-from app.services.ai_service_manager import AIServiceManager
+from app.services.anthropic_ai_service import AnthropicAIService
+from app.services.dummy_ai_service import DummyAIService
+from app.services.gemini_ai_service import GeminiAIService
+from app.services.http_client import close_http_client
+from app.services.openai_ai_service import OpenAIAIService
 
 load_dotenv()
 
+# Service class and API key variable for each service, in report order.
+# Services are created directly rather than through the global manager, so
+# each test gets its own instance and they can run concurrently.
+SERVICES = {
+    "openai": (OpenAIAIService, "OPENAI_API_KEY"),
+    "gemini": (GeminiAIService, "GEMINI_API_KEY"),
+    "anthropic": (AnthropicAIService, "ANTHROPIC_API_KEY"),
+    "dummy": (DummyAIService, None),
+}
 
-async def test_service(service_name: str, manager: AIServiceManager) -> bool:
+
+async def test_service(service_name: str) -> bool:
     """Test a specific AI service."""
     print(f"\n🧪 Testing {service_name.upper()} service...")
 
     try:
-        success = manager.switch_service(service_name)
-        if not success:
-            print(f"❌ Failed to switch to {service_name} service")
-            return False
-
-        service = manager.get_service()
+        service_class, _ = SERVICES[service_name]
+        service = service_class()
         response, conv_id = await service.process_message(
             "Hello! This is a test message. Please respond briefly."
         )
@@ -48,22 +58,30 @@ async def main():
     print("🤖 AI Services Test Suite")
     print("=" * 50)
 
-    manager = AIServiceManager()
-
     # Check available services
-    available_services = manager.get_available_services()
+    available_services = [
+        service_name
+        for service_name, (_, env_var) in SERVICES.items()
+        if env_var is None or os.getenv(env_var)
+    ]
     print(f"📋 Available services: {', '.join(available_services)}")
 
-    # Test each available service
     results = {}
-    for service_name in ["openai", "gemini", "anthropic", "dummy"]:
-        if service_name in available_services:
-            results[service_name] = await test_service(service_name, manager)
-        else:
+    for service_name in SERVICES:
+        if service_name not in available_services:
             print(
                 f"\n⏭️  Skipping {service_name.upper()} (no API key configured)"
             )
-            results[service_name] = None
+        results[service_name] = None
+
+    # Test all available services concurrently
+    try:
+        outcomes = await asyncio.gather(
+            *(test_service(name) for name in available_services)
+        )
+    finally:
+        await close_http_client()
+    results.update(zip(available_services, outcomes))
 
     # Summary
     print("\n" + "=" * 50)